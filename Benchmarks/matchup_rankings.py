@@ -0,0 +1,123 @@
+# Benchmark for the matchup query in Shared.get_user_matchup_from_database.
+# Compares the old correlated count(1) rankings against the precomputed TeamRankings join.
+#
+# Builds Bench* tables shaped like the real ones in a scratch database, fills them with TEAMS_PER_LEAGUE teams
+# in each of LEAGUES leagues for YEARS seasons, times both queries, then drops the tables.
+#
+# Usage (from the srcroot, so Shared can find config.json):
+#   python3 Benchmarks/matchup_rankings.py --scratch-db <database>
+#
+# It creates and drops tables, so it won't run without --scratch-db, and won't run against the configured database.
+# The scratch database has to exist already, on the same server and with the same login as config.json.
+
+# Python Libraries
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+# Local Includes
+import Config
+from Shared import query_database
+
+LEAGUES = 16
+TEAMS_PER_LEAGUE = 14
+YEARS = 12
+ITERATIONS = 200
+
+old_query = """
+    SELECT l.name as league_name, me_u.FFname as name, me.currentWeekPF as PF, opp_u.FFname as opp_name, opp.currentWeekPF as opp_PF,
+        (select count(1) FROM BenchTeams t where t.currentWeekPF > me.currentWeekPF and t.year=%s)+1 as ranking,
+        (select count(1) FROM BenchTeams t where t.currentWeekPF > opp.currentWeekPF and t.year=%s)+1 as opp_ranking
+        FROM BenchTeams AS me
+        LEFT JOIN BenchTeams AS opp ON (me.CurrOpp=opp.teamID AND me.year=opp.year)
+        INNER JOIN BenchUsers AS me_u ON me.ownerID=me_u.FFid
+        LEFT JOIN BenchUsers AS opp_u ON opp.ownerID=opp_u.FFid
+        INNER JOIN BenchLeagues AS l ON (me.leagueID=l.id AND me.year=l.year)
+        WHERE LOWER(l.name)=%s AND LOWER(me_u.FFname)=%s AND l.year=%s
+"""
+
+new_query = """
+    SELECT l.name as league_name, me_u.FFname as name, me.currentWeekPF as PF, opp_u.FFname as opp_name, opp.currentWeekPF as opp_PF,
+        me_r.ranking as ranking, opp_r.ranking as opp_ranking
+        FROM BenchTeams AS me
+        LEFT JOIN BenchTeams AS opp ON (me.CurrOpp=opp.teamID AND me.year=opp.year)
+        INNER JOIN BenchUsers AS me_u ON me.ownerID=me_u.FFid
+        LEFT JOIN BenchUsers AS opp_u ON opp.ownerID=opp_u.FFid
+        LEFT JOIN BenchTeamRankings AS me_r ON (me.teamID=me_r.teamID AND me.year=me_r.year)
+        LEFT JOIN BenchTeamRankings AS opp_r ON (opp.teamID=opp_r.teamID AND opp.year=opp_r.year)
+        INNER JOIN BenchLeagues AS l ON (me.leagueID=l.id AND me.year=l.year)
+        WHERE LOWER(l.name)=%s AND LOWER(me_u.FFname)=%s AND l.year=%s
+"""
+
+def drop_tables():
+    for table in ["BenchTeams", "BenchUsers", "BenchLeagues", "BenchTeamRankings"]:
+        query_database(f"DROP TABLE IF EXISTS {table}", fetch=None)
+
+def create_tables():
+    drop_tables()
+    query_database("CREATE TABLE BenchUsers (FFid INT PRIMARY KEY, FFname VARCHAR(64))", fetch=None)
+    query_database("CREATE TABLE BenchLeagues (id INT, year INT, name VARCHAR(64), PRIMARY KEY (id, year))", fetch=None)
+    query_database("CREATE TABLE BenchTeams (teamID INT, year INT, leagueID INT, ownerID INT, CurrOpp INT, currentWeekPF DOUBLE, PRIMARY KEY (teamID, year), KEY (year))", fetch=None)
+    query_database("CREATE TABLE BenchTeamRankings (year INT, teamID INT, ranking INT, PRIMARY KEY (year, teamID))", fetch=None)
+
+    users = LEAGUES*TEAMS_PER_LEAGUE
+    for user in range(users):
+        query_database("INSERT INTO BenchUsers VALUES (%s, %s)", (user, f"user{user}"), fetch=None)
+
+    for year in range(2014, 2014+YEARS):
+        for league in range(LEAGUES):
+            league_id = year*100 + league
+            query_database("INSERT INTO BenchLeagues VALUES (%s, %s, %s)", (league_id, year, f"league{league}"), fetch=None)
+
+            for team in range(TEAMS_PER_LEAGUE):
+                team_id = league_id*100 + team
+                opp_id = league_id*100 + (team ^ 1)
+                owner = league*TEAMS_PER_LEAGUE + team
+                query_database("INSERT INTO BenchTeams VALUES (%s, %s, %s, %s, %s, %s)", (team_id, year, league_id, owner, opp_id, round(random.uniform(0, 150), 2)), fetch=None)
+
+        query_database("""
+            INSERT INTO BenchTeamRankings (year, teamID, ranking)
+                SELECT year, teamID, RANK() OVER (ORDER BY currentWeekPF DESC) FROM BenchTeams WHERE year=%s
+        """, (year,), fetch=None)
+
+def time_query(query, params_for):
+    start = time.perf_counter()
+    for i in range(ITERATIONS):
+        query_database(query, params_for(i))
+    return (time.perf_counter() - start) / ITERATIONS
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "--scratch-db":
+        print("Usage: matchup_rankings.py --scratch-db <database>")
+        sys.exit(1)
+
+    if sys.argv[2] == Config.config["sql_dbname"]:
+        print(f"{sys.argv[2]} is the bot's database. Use a scratch one.")
+        sys.exit(1)
+
+    # The pool connects lazily, so this points every query at the scratch database
+    Config.config["sql_dbname"] = sys.argv[2]
+
+    create_tables()
+    try:
+        year = 2014 + YEARS - 1
+        user_for = lambda i: (f"league{(i % (LEAGUES*TEAMS_PER_LEAGUE)) // TEAMS_PER_LEAGUE}", f"user{i % (LEAGUES*TEAMS_PER_LEAGUE)}")
+
+        # Make sure both queries agree before timing them
+        for i in range(LEAGUES*TEAMS_PER_LEAGUE):
+            league, user = user_for(i)
+            old = query_database(old_query, (year, year, league, user, year))
+            new = query_database(new_query, (league, user, year))
+            assert [(row["ranking"], row["opp_ranking"]) for row in old] == [(row["ranking"], row["opp_ranking"]) for row in new], f"Rankings differ for {user}"
+
+        old_time = time_query(old_query, lambda i: (year, year, *user_for(i), year))
+        new_time = time_query(new_query, lambda i: (*user_for(i), year))
+
+        print(f"{LEAGUES*TEAMS_PER_LEAGUE*YEARS} teams over {YEARS} seasons, {ITERATIONS} lookups each")
+        print(f"correlated counts: {1000*old_time:.3f} ms/lookup")
+        print(f"precomputed join:  {1000*new_time:.3f} ms/lookup ({old_time/new_time:.1f}x faster)")
+    finally:
+        drop_tables()
@@ -0,0 +1,109 @@
+# Microbenchmark for the per-poll event lookups in Scoreboard.parse_game.
+# Compares the old filter-per-logged-event scan against index_play_by_play on a recorded play-by-play.
+#
+# Usage (from the srcroot, so Shared can find config.json):
+#   python3 Benchmarks/play_by_play_index.py --record <game_id> data/pbp_<game_id>.json
+#   python3 Benchmarks/play_by_play_index.py data/pbp_<game_id>.json
+#   python3 Benchmarks/play_by_play_index.py --synthetic <goals>
+#
+# Pick a high-scoring game (lots of goals to look up, lots of plays to scan) to see the difference.
+# --synthetic builds a game shaped like the NHL's play-by-play instead, for when the API isn't reachable.
+
+# Python Libraries
+import json
+import os
+import sys
+import timeit
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+# Local Includes
+from Cogs.Scoreboard_Helper import index_play_by_play
+
+ITERATIONS = 1000
+PLAYS_PER_PERIOD = 110 # Roughly what a real period has once faceoffs, hits, shots, stoppages, etc are counted
+SHOOTOUT_ROUNDS = 5
+
+def record(game_id, path):
+    with urllib.request.urlopen(f"https://api-web.nhle.com/v1/gamecenter/{game_id}/play-by-play") as response:
+        play_by_play = json.load(response)
+
+    with open(path, "w") as f:
+        json.dump(play_by_play, f)
+
+    print(f"Recorded {len(play_by_play['plays'])} plays from game {game_id} to {path}")
+
+# 3 periods, OT, and a shootout, with the goals spread evenly across regulation and OT
+def synthesize(goals):
+    plays = []
+
+    def add(type, number, period_type):
+        plays.append({"eventId": len(plays) + 1, "sortOrder": len(plays) + 1, "typeDescKey": type,
+                      "periodDescriptor": {"number": number, "periodType": period_type}})
+
+    periods = [(1, "REG"), (2, "REG"), (3, "REG"), (4, "OT")]
+    goals_left = goals
+    for i, (number, period_type) in enumerate(periods):
+        period_goals = goals_left // (len(periods) - i)
+        goals_left -= period_goals
+
+        add("period-start", number, period_type)
+        for play in range(PLAYS_PER_PERIOD):
+            is_goal = period_goals > 0 and play % (PLAYS_PER_PERIOD // period_goals) == 0
+            add("goal" if is_goal else "faceoff", number, period_type)
+        add("period-end", number, period_type)
+
+    add("period-start", 5, "SO")
+    for attempt in range(2*SHOOTOUT_ROUNDS):
+        add("goal" if attempt % 3 == 0 else "missed-shot", 5, "SO")
+    add("shootout-complete", 5, "SO")
+    add("game-end", 5, "SO")
+
+    return {"plays": plays}
+
+# The ids check_disallowed_goals looks up on every poll: every posted goal, plus the start and the final
+def get_logged_event_ids(play_by_play):
+    return [str(event["eventId"]) for event in play_by_play["plays"] if event["typeDescKey"] in ["goal", "period-start", "game-end"]]
+
+def before(play_by_play, logged_event_ids):
+    for logged_event_id in logged_event_ids:
+        found = list(filter(lambda event: (str(event["eventId"]) == logged_event_id), play_by_play["plays"]))
+        if len(found) == 0 or found[0]["typeDescKey"] != "goal":
+            pass
+
+    goals = [event for event in play_by_play["plays"] if event["typeDescKey"] == "goal" and event["periodDescriptor"]["periodType"] != "SO"]
+    shootout = [event for event in play_by_play["plays"] if event["periodDescriptor"]["periodType"] == "SO"]
+    return goals, shootout
+
+def after(play_by_play, logged_event_ids):
+    index = index_play_by_play(play_by_play)
+    for logged_event_id in logged_event_ids:
+        found = index["by_id"].get(logged_event_id)
+        if found == None or found["typeDescKey"] != "goal":
+            pass
+
+    return index["goals"], index["shootout"]
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--record":
+        record(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    if len(sys.argv) == 3 and sys.argv[1] == "--synthetic":
+        play_by_play = synthesize(int(sys.argv[2]))
+    elif len(sys.argv) == 2:
+        with open(sys.argv[1], "r") as f:
+            play_by_play = json.load(f)
+    else:
+        print("Usage: play_by_play_index.py [--record <game_id>] <play_by_play.json> | --synthetic <goals>")
+        sys.exit(1)
+
+    logged_event_ids = get_logged_event_ids(play_by_play)
+    print(f"{len(play_by_play['plays'])} plays, {len(logged_event_ids)} logged events, {ITERATIONS} polls")
+
+    before_time = timeit.timeit(lambda: before(play_by_play, logged_event_ids), number=ITERATIONS)
+    after_time = timeit.timeit(lambda: after(play_by_play, logged_event_ids), number=ITERATIONS)
+
+    print(f"before: {1000*before_time/ITERATIONS:.3f} ms/poll")
+    print(f"after:  {1000*after_time/ITERATIONS:.3f} ms/poll ({before_time/after_time:.1f}x faster)")
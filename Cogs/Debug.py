@@ -147,6 +147,15 @@ class Debug(WesCog):
         await scoreboard_cog.do_ot_rollover()
         await interaction.followup.send("Complete")
 
+    @app_commands.command(name="clear_cache", description="Drops the cached league, user, and team owner lookups.")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.checks.has_permissions(manage_guild=True)
+    @app_commands.checks.check(is_bot_owner)
+    async def clear_cache(self, interaction: discord.Interaction):
+        invalidate_league_caches()
+        await interaction.response.send_message("League caches cleared.", ephemeral=True)
+
 #endregion
 
 async def setup(bot):
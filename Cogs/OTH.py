@@ -1,10 +1,11 @@
 # Python Libraries
 import asyncio
 from datetime import datetime, timedelta, timezone
-from lxml import etree # xml parsing
 import os
 import pytz
+import re
 import subprocess
+import time
 
 # Discord Libraries
 import discord
@@ -20,6 +21,19 @@ class OTH(WesCog):
     def __init__(self, bot):
         super().__init__(bot)
 
+        # Only one Challonge refresh at a time, whether it comes from the loop or a command
+        self.woppacup_lock = asyncio.Lock()
+
+        # After a failed refresh, commands keep serving the last good snapshot until this instead of going back to Challonge
+        self.woppacup_retry_after = datetime.min.replace(tzinfo=timezone.utc)
+
+        # Trades that have already been posted, so that we can ignore them
+        self.posted_trades = IdSetFile(posted_trades_datafile)
+
+        # The running current PF refresh, if any, and when the last one finished
+        self.current_pf_refresh = None
+        self.current_pf_updated = None
+
     async def cog_load(self):
         self.bot.loop.create_task(self.start_loops())
 
@@ -30,6 +44,12 @@ class OTH(WesCog):
         self.inactives_loop.start()
         self.loops.append(self.inactives_loop)
 
+        self.woppacup_loop.start()
+        self.loops.append(self.woppacup_loop)
+
+        self.current_pf_loop.start()
+        self.loops.append(self.current_pf_loop)
+
 #region Custom cog-specific exceptions
 
     class WoppaCupOpponentNotFound(discord.ext.commands.CommandError):
@@ -211,45 +231,131 @@ class OTH(WesCog):
 #endregion
 #region League management tools (inactives and trade review)
 
-    # Checks all OTH leagues for inactive managers and abandoned teams
-    async def check_inactives(self):
+    # Fleaflicker renders the last lineup change on the team page as <relative-time datetime="...">
+    last_lineup_change_pattern = re.compile(rb'<relative-time[^>]*?\sdatetime="([^"]+)"')
+
+    # Returns the last lineup change for a team as a UTC datetime, or None if the page couldn't be read
+    async def get_last_lineup_change(self, team_url, semaphore, limiter):
+        async with semaphore:
+            await limiter.wait(team_url)
+            try:
+                dt_str = await find_in_page(team_url, OTH.last_lineup_change_pattern, self.log)
+            except LinkError as e:
+                self.log.error(f"Could not load {team_url}: {e.message}")
+                return None
+
+        if dt_str == None:
+            self.log.error(f"No lineup change time found on {team_url}")
+            return None
+
+        return datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
+
+    # Checks all OTH leagues for inactive managers and abandoned teams.
+    # Each team's last lineup change is remembered in inactives_datafile, and its page is only re-checked once
+    # that change is old enough to cross MIN_INACTIVE_DAYS. The daily check only reports teams that went inactive
+    # since they were last reported, and full_report reports all of them.
+    async def check_inactives(self, full_report=False):
         return # disabled for offseason. TODO: Add a weekvar check here once I get my shared config file
 
+        start = time.monotonic()
+        now = datetime.now(timezone.utc)
         channel = self.bot.get_channel(MODS_CHANNEL_ID)
-        leagues = get_leagues_from_database(Config.config["year"])
-        for league in leagues:
-            msg = ""
-            standings = make_api_call(f"https://www.fleaflicker.com/api/FetchLeagueStandings?sport=NHL&league_id={league['id']}")
+        leagues = await asyncio.to_thread(get_leagues_from_database, Config.config["year"])
+        semaphore = asyncio.Semaphore(SCRAPE_MAX_CONCURRENT_REQUESTS)
+        limiter = HostRateLimiter(SCRAPE_REQUESTS_PER_SECOND)
+
+        try:
+            inactives = await asyncio.to_thread(LoadJsonFile, inactives_datafile)
+        except DataFileNotFound:
+            inactives = {}
+
+        # A league that can't be loaded is logged and skipped, instead of sinking the whole check
+        async def get_standings(league):
+            async with semaphore:
+                await limiter.wait("https://www.fleaflicker.com")
+                try:
+                    standings = await make_api_call(f"https://www.fleaflicker.com/api/FetchLeagueStandings?sport=NHL&league_id={league['id']}")
+                except LinkError:
+                    standings = None
+                if standings == None or "divisions" not in standings:
+                    self.log.error(f"Could not load standings for {league['name']}. Skipping it this time.")
+                    return None
+                return standings
+
+        all_standings = await asyncio.gather(*[get_standings(league) for league in leagues])
+        league_standings = [(league, standings) for league, standings in zip(leagues, all_standings) if standings != None]
+
+        # Old code based on the "lastSeenIso", which is the last time the owner logged in.
+        # Doesn't work well for people who have other teams on Fleaflicker
+        # last_seen = team["owners"][0]["lastSeenIso"]
+        # last_seen = datetime.strptime(last_seen, "%Y-%m-%dT%H:%M:%SZ")
+
+        # A team can't go inactive until MIN_INACTIVE_DAYS after its last known lineup change, so only those
+        # past that point (or never checked) need their page loaded again
+        num_teams = 0
+        due_teams = []
+        for league, standings in league_standings:
+            for team in standings["divisions"][0]["teams"]:
+                if "owners" not in team:
+                    continue
 
+                num_teams += 1
+                state = inactives.get(str(team["id"]))
+                if state == None or state["last_change"] == None or datetime.fromisoformat(state["last_change"]) + timedelta(days=MIN_INACTIVE_DAYS+1) <= now:
+                    due_teams.append((league, team))
+
+        progress = {"done": 0}
+        async def check_team(league, team):
+            last_lineup_change = await self.get_last_lineup_change(f"https://www.fleaflicker.com/nhl/leagues/{league['id']}/teams/{team['id']}", semaphore, limiter)
+            progress["done"] += 1
+            if progress["done"] % 25 == 0 or progress["done"] == len(due_teams):
+                self.log.info(f"Inactives check: {progress['done']}/{len(due_teams)} teams scanned.")
+            return last_lineup_change
+
+        last_lineup_changes = await asyncio.gather(*[check_team(league, team) for league, team in due_teams])
+        for (league, team), last_lineup_change in zip(due_teams, last_lineup_changes):
+            # Keep what we knew before if the page couldn't be read this time
+            if last_lineup_change != None:
+                state = inactives.setdefault(str(team["id"]), {"last_change": None, "reported": None})
+                state["last_change"] = last_lineup_change.isoformat()
+
+        # Rebuild the state from this season's teams, so old teams fall out of the file. If a league was skipped,
+        # keep everything we had so its teams don't lose their state (and get reported again next time).
+        new_inactives = dict(inactives) if len(league_standings) < len(leagues) else {}
+        for league, standings in league_standings:
+            msg = ""
             for team in standings["divisions"][0]["teams"]:
                 team_url = f"https://www.fleaflicker.com/nhl/leagues/{league['id']}/teams/{team['id']}"
+                state = inactives.get(str(team["id"]), {"last_change": None, "reported": None})
+                new_inactives[str(team["id"])] = state
 
                 # If there's no owners, mark as inactive
                 if "owners" not in team:
-                    msg += f"**{league['name']}**: *Unowned team: {team['name']}* {team_url}\n"
-                    continue
+                    report = "unowned"
+                    line = f"**{league['name']}**: *Unowned team: {team['name']}* {team_url}\n"
+                else:
+                    if state["last_change"] == None:
+                        continue
 
-                # Old code based on the "lastSeenIso", which is the last time the owner logged in.
-                # Doesn't work well for people who have other teams on Fleaflicker
-                # last_seen = team["owners"][0]["lastSeenIso"]
-                # last_seen = datetime.strptime(last_seen, "%Y-%m-%dT%H:%M:%SZ")
+                    time_since_change = now - datetime.fromisoformat(state["last_change"])
+                    if time_since_change.days <= MIN_INACTIVE_DAYS:
+                        state["reported"] = None
+                        continue
 
-                # Check the last lineup change for the team
-                log_api_usage_telemetry("fleaflicker.com") # Hardcoded because not using my make_api_call method
-                response = requests.get(team_url)
-                tree = etree.HTML(response.text)
-                dt_str = tree.xpath("//relative-time/@datetime")[0]
-                last_lineup_change = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-                time_since_change = datetime.now(timezone.utc) - last_lineup_change
+                    report = state["last_change"]
+                    line = f"**{league['name']}**: *Owner {team['owners'][0]['displayName']} no lineup changes in last {time_since_change.days} days* {team_url}\n"
 
-                if time_since_change.days > MIN_INACTIVE_DAYS:
-                    msg += f"**{league['name']}**: *Owner {team['owners'][0]['displayName']} no lineup changes in last {time_since_change.days} days* {team_url}\n"
+                if full_report or state["reported"] != report:
+                    msg += line
+                state["reported"] = report
 
             if msg != "":
                 await channel.send(msg, suppress_embeds=True)
-        self.log.info("Inactives check complete.")
 
-    @tasks.loop(hours=7*24.0) # weekly -- could check more often if MIN_INACTIVE_DAYS is set to smaller
+        await asyncio.to_thread(WriteJsonFile, inactives_datafile, new_inactives)
+        self.log.info(f"Inactives check complete. Scanned {len(due_teams)} of {num_teams} teams in {len(leagues)} leagues in {time.monotonic()-start:.1f}s.")
+
+    @tasks.loop(hours=24.0) # daily -- cheap, since only teams that could have gone inactive get checked
     async def inactives_loop(self):
         await self.check_inactives()
 
@@ -257,14 +363,11 @@ class OTH(WesCog):
     async def before_inactives_loop(self):
         await self.bot.wait_until_ready()
 
-        # Sleep until midnight Sunday (Sat night) to call at the same time every week
+        # Sleep until midnight to call at the same time every day
         curr_time = datetime.utcnow()-timedelta(hours=ROLLOVER_HOUR_UTC)
-        days_delta = timedelta((13-curr_time.weekday()) % 7)
-        target_time = curr_time + days_delta
+        target_time = curr_time + timedelta(days=1)
         target_time = target_time.replace(hour=0, minute=0, second=0, microsecond=0)
         delta = target_time-curr_time
-        while delta.days < 0:
-            delta += timedelta(days=7)
 
         self.log.info("Sleeping inactives_loop for " + str(delta))
         await asyncio.sleep(delta.total_seconds())
@@ -282,15 +385,15 @@ class OTH(WesCog):
     @app_commands.checks.check(is_mods_channel)
     async def inactives(self, interaction: discord.Interaction):
         await interaction.response.send_message("Checking inactives.", ephemeral=True)
-        await self.check_inactives()
+        await self.check_inactives(full_report=True)
 
-    # Formats a json trade into a discord embed
-    def format_trade(self, league, trade):
+    # Formats a json trade into a discord embed. owners comes from get_owners_for_teams.
+    def format_trade(self, league, trade, owners):
         embed = discord.Embed(url=f"https://www.fleaflicker.com/nhl/leagues/{league['id']}/trades/{trade['id']}")
         embed.title = "Trade in " + league["name"]
         n_teams = 1
         for team in trade["teams"]:
-            owner = get_owner_for_team(Config.config["year"], team["team"]["id"])["FFname"]
+            owner = owners.get(team["team"]["id"])
 
             if "playersObtained" not in team:
                 embed.add_field(name=f"**{team['team']['name']} ({owner})**", value="No players going to this team -- please investigate.")
@@ -324,52 +427,62 @@ class OTH(WesCog):
     async def check_trades(self, verbose=False):
         return # disabled for offseason. TODO: Add a weekvar check here once I get my shared config file
 
-        # Find the list of trades that have already been posted so that we can ignore them.
-        f = open("data/posted_trades.txt", "a+")
-        f.seek(0)
-        posted = [int(x.strip()) for x in f.readlines()]
-
         # Get the list of leagueIds for this year from the database
-        leagues = get_leagues_from_database(Config.config["year"])
+        leagues = await asyncio.to_thread(get_leagues_from_database, Config.config["year"])
 
         trades_channel = self.bot.get_channel(TRADEREVIEW_CHANNEL_ID)
         hockey_general_channel = self.bot.get_channel(HOCKEY_GENERAL_CHANNEL_ID)
 
-        # Make Fleaflicker API calls to get pending trades in all the leagues
-        count = 0
-        for league in leagues:
-            trades = make_api_call(f"https://www.fleaflicker.com/api/FetchTrades?sport=NHL&league_id={league['id']}&filter=TRADES_UNDER_REVIEW")
-
+        # Make Fleaflicker API calls to get pending trades in all the leagues at once
+        # A league that can't be loaded is logged and skipped, instead of sinking the check for every league
+        semaphore = asyncio.Semaphore(SCRAPE_MAX_CONCURRENT_REQUESTS)
+        async def get_trades(league):
+            async with semaphore:
+                try:
+                    return await make_api_call(f"https://www.fleaflicker.com/api/FetchTrades?sport=NHL&league_id={league['id']}&filter=TRADES_UNDER_REVIEW")
+                except LinkError as e:
+                    self.log.error(f"Could not load trades for {league['name']}. Skipping it this time. {e}")
+                    return None
+
+        all_trades = await asyncio.gather(*[get_trades(league) for league in leagues])
+
+        # Skip the ones that have already been posted
+        new_trades = []
+        for league, trades in zip(leagues, all_trades):
             # No trades in this league
-            if "trades" not in trades:
+            if trades == None or "trades" not in trades:
                 continue
 
-            # Post each trade in this league
             for trade in trades["trades"]:
-                if trade["id"] in posted:
-                    continue
+                if trade["id"] not in self.posted_trades:
+                    new_trades.append((league, trade))
 
-                trade_embed = self.format_trade(league, trade)
-                await trades_channel.send(f"<@&{TRADEREVIEW_ROLE_ID}>", embed=trade_embed)
-                msg = await hockey_general_channel.send(embed=trade_embed)
+        # Look up the owners of every team in every new trade at once
+        team_ids = [team["team"]["id"] for league, trade in new_trades for team in trade["teams"]]
+        owners = await asyncio.to_thread(get_owners_for_teams, Config.config["year"], team_ids)
 
-                # Add reactions to the message for each team in the trade
-                number_emojis = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣"]
-                if len(trade["teams"]) < len(number_emojis):
-                    for n in range(len(trade["teams"])):
-                        await msg.add_reaction(number_emojis[n])
+        # Post each new trade
+        count = 0
+        for league, trade in new_trades:
+            trade_embed = self.format_trade(league, trade, owners)
+            await trades_channel.send(f"<@&{TRADEREVIEW_ROLE_ID}>", embed=trade_embed)
+            msg = await hockey_general_channel.send(embed=trade_embed)
 
-                count += 1
+            # Add reactions to the message for each team in the trade
+            number_emojis = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣"]
+            if len(trade["teams"]) < len(number_emojis):
+                for n in range(len(trade["teams"])):
+                    await msg.add_reaction(number_emojis[n])
+
+            count += 1
 
-                # Append this trade ID to the list of trades already covered
-                f.write(str(trade["id"]) + "\n")
+            # Add this trade ID to the list of trades already covered
+            self.posted_trades.add(trade["id"])
 
         # Message if no trades were found
         if count == 0 and verbose:
             await trades_channel.send("No pending trades in any league.")
 
-        f.close()
-
         self.log.info("Trades check complete.")
 
     # Check fleaflicker for recent trades
@@ -405,6 +518,37 @@ class OTH(WesCog):
             stderr=subprocess.DEVNULL
         )
 
+    async def do_refresh_current_pf(self):
+        await asyncio.to_thread(self.run_update_current_pf_script)
+        await asyncio.to_thread(refresh_weekly_rankings, Config.config["year"])
+        self.current_pf_updated = datetime.now(timezone.utc)
+
+    # Updates every team's current week PF and rankings. Anyone who asks while a refresh is already
+    # running waits on that one instead of starting their own.
+    async def refresh_current_pf(self):
+        if self.current_pf_refresh == None or self.current_pf_refresh.done():
+            self.current_pf_refresh = asyncio.create_task(self.do_refresh_current_pf())
+
+        # Shielded so one caller getting cancelled doesn't cancel the refresh for everyone else
+        await asyncio.shield(self.current_pf_refresh)
+
+    @tasks.loop(seconds=CURRENT_PF_REFRESH_SECONDS)
+    async def current_pf_loop(self):
+        # Nothing to update in the offseason. /matchup still refreshes on demand if someone asks.
+        if not is_fantasy_season():
+            return
+
+        await self.refresh_current_pf()
+
+    @current_pf_loop.before_loop
+    async def before_current_pf_loop(self):
+        await self.bot.wait_until_ready()
+
+    @current_pf_loop.error
+    async def current_pf_loop_error(self, error):
+        await self.cog_command_error(None, error)
+        self.current_pf_loop.restart()
+
     @app_commands.command(name="matchup", description="Check the current matchup score for a user.")
     @app_commands.describe(user="A fleaflicker username", division="(Optional) User's division")
     @app_commands.guild_only()
@@ -413,9 +557,11 @@ class OTH(WesCog):
     async def matchup(self, interaction: discord.Interaction, user: str, division: str = None):
         await interaction.response.defer(thinking=True)
 
-        await asyncio.to_thread(self.run_update_current_pf_script)
+        # The loop keeps this up to date, so only refresh here if it's fallen behind
+        if self.current_pf_updated == None or datetime.now(timezone.utc) - self.current_pf_updated > timedelta(seconds=CURRENT_PF_MAX_AGE_SECONDS):
+            await self.refresh_current_pf()
 
-        matchup = get_user_matchup_from_database(user, division)
+        matchup = await asyncio.to_thread(get_user_matchup_from_database, user, division)
         if len(matchup) == 0:
             raise UserNotFound(user, division)
         if len(matchup) > 1:
@@ -445,17 +591,79 @@ class OTH(WesCog):
 
         tier_colors = [None, "#EFC333", "#3D99D8", "#E37E2E", "#3DCB77", "#AD1457"]
         color = discord.Color.from_str(tier_colors[matchup['tier']])
-        embed = discord.Embed(title=f"{matchup['league_name']} Matchup", description=f"{msg}", url=link, color=color)
+        embed = discord.Embed(title=f"{matchup['league_name']} Matchup", description=f"{msg}", url=link, color=color, timestamp=self.current_pf_updated)
+
+        # Timestamp shows up in the footer in each user's own timezone
+        age = int((datetime.now(timezone.utc) - self.current_pf_updated).total_seconds() // 60)
+        embed.set_footer(text=f"Scores updated {age} min ago" if age > 0 else "Scores updated just now")
         await interaction.followup.send(embed=embed)
 
 #endregion
 #region Woppa Cup
 
+    def is_woppacup_snapshot_fresh(self):
+        snapshot = WoppaCup.snapshot
+        return snapshot != None and datetime.now(timezone.utc) - snapshot["fetched"] < timedelta(seconds=WOPPACUP_SNAPSHOT_TTL_SECONDS)
+
+    async def refresh_woppacup_snapshot(self, force=False):
+        async with self.woppacup_lock:
+            # Someone else may have refreshed it while we were waiting on the lock
+            if not force and self.is_woppacup_snapshot_fresh():
+                return
+
+            try:
+                snapshot = await asyncio.to_thread(WoppaCup.load_snapshot)
+            except:
+                self.woppacup_retry_after = datetime.now(timezone.utc) + timedelta(seconds=WOPPACUP_REFRESH_SECONDS)
+                raise
+
+            # The pages need the database too, but /wc and /wc_bracket don't need the pages, so don't let them fail together
+            try:
+                snapshot["pages"] = await asyncio.to_thread(WoppaCup.render_pages, snapshot)
+            except Exception as e:
+                self.log.error(f"Error rendering Woppa Cup pages: {type(e).__name__}: {e}")
+                snapshot["pages"] = [WoppaCup.get_message_page(snapshot, "Scores are unavailable right now. Try again in a few minutes.")]
+
+            WoppaCup.snapshot = snapshot
+            self.log.info(f"Woppa Cup snapshot refreshed ({len(WoppaCup.snapshot['round_matches'])} matches this round).")
+
+    # Commands answer from the snapshot, and only go to Challonge themselves if the loop has fallen behind.
+    # If that refresh fails (or one failed recently), they get the last good snapshot instead of an error.
+    async def get_woppacup_snapshot(self):
+        if self.is_woppacup_snapshot_fresh():
+            return WoppaCup.snapshot
+
+        if WoppaCup.snapshot != None and datetime.now(timezone.utc) < self.woppacup_retry_after:
+            return WoppaCup.snapshot
+
+        try:
+            await self.refresh_woppacup_snapshot()
+        except Exception as e:
+            if WoppaCup.snapshot == None:
+                raise
+            self.log.error(f"Error refreshing Woppa Cup snapshot, serving the last one: {type(e).__name__}: {e}")
+
+        return WoppaCup.snapshot
+
+    @tasks.loop(seconds=WOPPACUP_REFRESH_SECONDS)
+    async def woppacup_loop(self):
+        if not WoppaCup.has_tournament_started:
+            return
+
+        # Challonge being down just waits for the next tick. Restarting would retry right away, over and over.
+        try:
+            await self.refresh_woppacup_snapshot(force=True)
+        except Exception as e:
+            self.log.error(f"Error refreshing Woppa Cup snapshot: {type(e).__name__}: {e}")
+
+    @woppacup_loop.before_loop
+    async def before_woppacup_loop(self):
+        await self.bot.wait_until_ready()
+
     @app_commands.command(name="wc_bracket", description="Dumps all WoppaCup scores to the chat. Only Ro16 and later.")
     @app_commands.guild_only()
     @app_commands.default_permissions(send_messages=True)
     @app_commands.checks.has_permissions(send_messages=True)
-    @app_commands.checks.cooldown(1, 300.0)
     async def woppacup_bracket(self, interaction: discord.Interaction):
         # Temp override for weeks where it's paused. Update the text as necessary.
         if not WoppaCup.has_tournament_started:
@@ -464,27 +672,23 @@ class OTH(WesCog):
 
         await interaction.response.defer(thinking=True, ephemeral=False)
 
-        participants, matches, url, winner, tourney_name = WoppaCup.get_wc_data()
-
-        if winner != None:
-            for p in participants:
-                if winner == p["id"]:
-                    winner = p["name"].split(".")[-1]
-                    break
-            embed = discord.Embed(title=tourney_name, description=f"The tournament is over. Congrats to {winner}!", url=url)
+        snapshot = await self.get_woppacup_snapshot()
+        if snapshot["winner"] != None:
+            embed = discord.Embed(title=snapshot["tourney_name"], description=f"The tournament is over. Congrats to {snapshot['winner']}!", url=snapshot["url"])
             await interaction.followup.send(embed=embed)
             return
 
-        curr_round, is_group_stage = WoppaCup.get_round_and_stage(matches)
-        matches = WoppaCup.trim_matches(matches, curr_round, is_group_stage)
-
+        matches = snapshot["round_matches"]
+        participants_by_player = snapshot["participants_by_player"]
         if len(matches) > 8:
             await interaction.followup.send("Too many matches remain to display full bracket. Please wait until Ro16")
             return
 
+        matchups = await asyncio.to_thread(WoppaCup.get_matchups_for_matches, matches, participants_by_player)
+
         embed = discord.Embed(title=f"Woppa Cup {WoppaCup.get_round_name(matches[0])}")
         for m in matches:
-            embed.add_field(name="", value=WoppaCup.get_description_for_woppacup_embed(m, participants), inline=False)
+            embed.add_field(name="", value=WoppaCup.get_description_for_woppacup_embed(m, participants_by_player, matchups), inline=False)
 
         await interaction.followup.send(embed=embed)
 
@@ -499,7 +703,9 @@ class OTH(WesCog):
             return
 
         await interaction.response.defer(thinking=True, ephemeral=True)
-        view = WoppaCup.WCView()
+        view = WoppaCup.WCView(await self.get_woppacup_snapshot())
+        if view.is_single_page():
+            view.clear_items()
         await interaction.followup.send(embed=view.embed, view=view)
 
     @app_commands.command(name="wc", description="Check the score for a specific manager's Woppa Cup matchup.")
@@ -516,23 +722,16 @@ class OTH(WesCog):
         await interaction.response.defer(thinking=True)
 
         user = sanitize_user(user)
-        participants, matches, url, winner, tourney_name = WoppaCup.get_wc_data()
-        if winner != None:
-            for p in participants:
-                if winner == p["id"]:
-                    winner = p["name"].split(".")[-1]
-                    break
-
-            embed = discord.Embed(title=tourney_name, description=f"The tournament is over. Congrats to {winner}!", url=url)
+        snapshot = await self.get_woppacup_snapshot()
+        tourney_name = snapshot["tourney_name"]
+        url = snapshot["url"]
+        if snapshot["winner"] != None:
+            embed = discord.Embed(title=tourney_name, description=f"The tournament is over. Congrats to {snapshot['winner']}!", url=url)
             await interaction.followup.send(embed=embed)
             return
 
         # Check that the user requested actually exists
-        me = None
-        for p in participants:
-            if p["name"].lower().split(".")[-1] == user:
-                me = p
-                break
+        me = snapshot["participants_by_name"].get(user)
 
         if me == None:
             embed = discord.Embed(title=tourney_name, description=f"User {user} either doesn't exist or was never in this tournament.", url=url)
@@ -540,26 +739,15 @@ class OTH(WesCog):
             await interaction.followup.send(embed=embed)
             return
 
-        curr_round, is_group_stage = WoppaCup.get_round_and_stage(matches)
-
         # Find the user's match from this week
         embed = None
-        for m in matches:
-            # Skip the group stage if necessary
-            if not is_group_stage and m["group_id"] != None:
-                continue
-
-            # Skip matches for other rounds
-            if m["round"] != curr_round:
-                continue
-
-            if m["player1_id"] == me["id"] or m["player2_id"] == me["id"] or m["player1_id"] in me["group_player_ids"] or m["player2_id"] in me["group_player_ids"]:
-                embed = WoppaCup.get_embed_for_woppacup_match(m, participants, url)
-                break
+        match = WoppaCup.get_match_for_participant(me, snapshot)
+        if match != None:
+            embed = await asyncio.to_thread(WoppaCup.get_embed_for_woppacup_match, match, snapshot)
 
         # A few scenarios for if the user is not playing this week
         if embed == None:
-            if is_group_stage:
+            if snapshot["is_group_stage"]:
                 embed = discord.Embed(title=tourney_name, description=f"User {user} is on bye.", url=url)
             else:
                 embed = discord.Embed(title=tourney_name, description=f"User {user} has been eliminated from the tournament.", url=url)
@@ -5,7 +5,7 @@ from discord import app_commands
 
 # Python Libraries
 import asyncio
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 from functools import reduce
 from zoneinfo import ZoneInfo
 
@@ -25,7 +25,24 @@ class Scoreboard(WesCog):
         self.messages_lock = asyncio.Lock()
         self.ot_lock = asyncio.Lock()
 
-        self.cooldown = 0
+        # self.messages is written out on a timer instead of after every post. See messages_flush_loop.
+        self.messages_writer = JsonFileWriter(messages_datafile, lambda: self.messages)
+
+        # Per-game polling schedule. game_id -> datetime of the next poll, or None once the game is done for the day
+        self.next_poll = {}
+        self.play_cursors = {}
+        self.rosters = {}
+
+        # game_id -> scoreboard summary fingerprint at the last play-by-play fetch, and when it has to be fetched again regardless
+        self.summary_fingerprints = {}
+        self.next_play_by_play_fetch = {}
+
+        self.next_scoreboard_poll = datetime.min.replace(tzinfo=timezone.utc)
+        self.next_iihf_poll = datetime.min.replace(tzinfo=timezone.utc)
+        self.cooldown_until = datetime.min.replace(tzinfo=timezone.utc)
+
+        # What the loop last saw, for the slash commands to render from. See publish_snapshot.
+        self.snapshot = {"version": 0, "updated": None, "games": [], "play_by_plays": {}, "iihf": {}}
 
 #region Cog Startup
 
@@ -36,23 +53,76 @@ class Scoreboard(WesCog):
         self.scores_loop.start()
         self.loops.append(self.scores_loop)
 
-    @tasks.loop(seconds=30)
+        self.messages_flush_loop.start()
+        self.loops.append(self.messages_flush_loop)
+
+    # Make sure the last few seconds of message state make it to disk on reload or shutdown
+    async def cog_unload(self):
+        await super().cog_unload()
+        await self.messages_writer.flush()
+
+    # Wakes up every few seconds, but each game is only polled when it's due based on its own state.
+    # See get_poll_interval and get_pregame_poll_interval for the cadences.
+    @tasks.loop(seconds=SCORES_LOOP_TICK_SECONDS)
     async def scores_loop(self):
-        if self.cooldown > 0:
-            self.cooldown -= 1
-            self.log.info(f"Scores loop on cooldown, skipping iteration. Cooldown remaining: {self.cooldown} cycles.")
+        now = datetime.now(timezone.utc)
+        if now < self.cooldown_until:
             return
 
-        games = await self.get_games_for_today()
-        for game in games:
-            await self.parse_game(game)
+        # Only hit the scoreboard when a game is due, or every so often to pick up rollovers and schedule changes
+        due = [game_id for game_id, next_poll in self.next_poll.items() if next_poll != None and next_poll <= now]
+        if len(due) > 0 or now >= self.next_scoreboard_poll:
+            self.next_scoreboard_poll = now + timedelta(seconds=SCOREBOARD_IDLE_SECONDS)
+            games = await self.get_games_for_today()
+            if games != None:
+                self.publish_snapshot(games=games)
+                await self.parse_games([game for game in games if self.is_game_due(str(game["id"]), now)])
+
+        if now >= self.next_iihf_poll:
+            self.next_iihf_poll = now + timedelta(seconds=IIHF_POLL_SECONDS)
+            await self.parse_iihf_games()
+
+    # Games we haven't seen yet are always due. Games that are done for the day are never due.
+    def is_game_due(self, game_id, now):
+        if game_id not in self.next_poll:
+            return True
+
+        return self.next_poll[game_id] != None and self.next_poll[game_id] <= now
+
+    # Publishes a new version of the snapshot with some of its pieces replaced. A published version is never
+    # modified afterwards, so a command can render from one while the loop keeps going.
+    def publish_snapshot(self, **changes):
+        snapshot = dict(self.snapshot)
+        snapshot.update(changes)
+        snapshot["version"] = self.snapshot["version"] + 1
+        snapshot["updated"] = datetime.now(timezone.utc)
+        self.snapshot = snapshot
+
+    # Shown with anything rendered from the snapshot, since it's only as fresh as the last time a game was due
+    def get_snapshot_age_string(self, snapshot):
+        age = int((datetime.now(timezone.utc) - snapshot["updated"]).total_seconds())
+        return f"Updated {age}s ago" if age > 0 else "Updated just now"
+
+    # Polls land on a fixed grid (every POLL_LIVE_SECONDS, or every POLL_FAST_SECONDS for fast games) instead of
+    # counting from whenever this game was parsed. That way games on the same cadence come due on the same tick
+    # and share one scoreboard fetch, instead of drifting apart and each triggering their own.
+    def schedule_next_poll(self, game_id, seconds):
+        if seconds == None:
+            self.next_poll[game_id] = None
+        else:
+            grid = min(seconds, POLL_LIVE_SECONDS)
+            next_poll = ((datetime.now(timezone.utc).timestamp() + seconds) // grid) * grid
+            self.next_poll[game_id] = datetime.fromtimestamp(next_poll, timezone.utc)
 
+    async def parse_iihf_games(self):
         try:
             for id, tourney_type in Config.config["active_iihf_tourneys"].items():
-                root = make_api_call(f"https://realtime.iihf.com/gamestate/GetLatestScoresState/{id}", self.log)
+                root = await make_api_call(f"https://realtime.iihf.com/gamestate/GetLatestScoresState/{id}", self.log)
                 if root == None:
                     return
 
+                self.publish_snapshot(iihf={**self.snapshot["iihf"], id: root})
+
                 for game in root:
                     # Skip upcoming games
                     if game["Status"] == "UPCOMING":
@@ -85,7 +155,7 @@ class Scoreboard(WesCog):
                     start_string = parse_iihf_start(game, " U20" if tourney_type.lower() == "wjc" else "")
                     await self.post_embed(breadcrumbs, "start", start_string)
 
-                    play_by_play = make_api_call(f"https://realtime.iihf.com/gamestate/GetLatestState/{game_id}", self.log)
+                    play_by_play = await make_api_call(f"https://realtime.iihf.com/gamestate/GetLatestState/{game_id}", self.log)
                     if play_by_play == None:
                         return
 
@@ -98,7 +168,14 @@ class Scoreboard(WesCog):
         except Exception as e:
             self.log.error(f"Error in IIHF Scoreboard parsing: {e}.")
 
-        flush_telemetry()
+    @tasks.loop(seconds=MESSAGES_FLUSH_SECONDS)
+    async def messages_flush_loop(self):
+        # A failed write leaves the writer dirty, so just log it and let the next tick try again.
+        # No restart from an error handler, since that would also bring the loop back after it's cancelled on unload.
+        try:
+            await self.messages_writer.flush()
+        except Exception as e:
+            self.log.error(f"Error flushing {messages_datafile}: {type(e).__name__}: {e}")
 
     @scores_loop.before_loop
     async def before_scores_loop(self):
@@ -152,7 +229,8 @@ class Scoreboard(WesCog):
                 # Archive the threads made for this OT challenge
                 await self.archive_ot_threads(game_id)
 
-                landing = make_api_call(f"https://api-web.nhle.com/v1/gamecenter/{game_id}/landing", self.log)
+                # These games are all over, so the landing page isn't going to change
+                landing = await make_api_call(f"https://api-web.nhle.com/v1/gamecenter/{game_id}/landing", self.log, cache_ttl=FINISHED_GAME_CACHE_SECONDS)
                 if landing == None:
                     return
 
@@ -212,17 +290,26 @@ class Scoreboard(WesCog):
         await self.do_ot_rollover()
 
         self.messages = {"date": date}
+        self.next_poll = {}
+        self.play_cursors = {}
+        self.rosters = {}
+        self.summary_fingerprints = {}
+        self.next_play_by_play_fetch = {}
+        clear_recap_cache()
+        self.publish_snapshot(games=[], play_by_plays={})
         async with self.messages_lock:
-            WriteJsonFile(messages_datafile, self.messages)
+            self.messages_writer.mark_dirty()
+            await self.messages_writer.flush()
 
     # Helper function to get all of the game JSON objects for the current day
-    # from the NHL.com api.
+    # from the NHL.com api. Returns None if the scoreboard can't be trusted right now.
     async def get_games_for_today(self):
         # Get the week scoreboard and today's date
-        root = make_api_call(f"https://api-web.nhle.com/v1/scoreboard/now", self.log)
+        root = await make_api_call(f"https://api-web.nhle.com/v1/scoreboard/now", self.log)
         if root == None:
-            self.cooldown = 4 # Skip 4 cycles (2 mins) as cooldown
-            return []
+            self.log.info("Scoreboard fetch failed. Putting the scores loop on a 2 minute cooldown.")
+            self.cooldown_until = datetime.now(timezone.utc) + timedelta(minutes=2)
+            return None
 
         curr_date = datetime.now(ZoneInfo("America/Los_Angeles")).date().isoformat()
         # date = self.messages["date"] # I think this works just as well, and apparently "focusedDate" breaks near the end of the SCF
@@ -239,7 +326,7 @@ class Scoreboard(WesCog):
         # site redundancy.
         if self.messages["date"] > curr_date:
             self.log.error(f"WRONG DATE {self.scores_loop.current_loop} date: {curr_date}, stored: {self.messages['date']}")
-            return []
+            return None
 
         # Get the list of games for the correct date
         for games in root["gamesByDate"]:
@@ -298,7 +385,7 @@ class Scoreboard(WesCog):
 #endregion
 #region Game Parsing Sections
 
-    def format_goal_embed(self, event, play_by_play):
+    def format_goal_embed(self, event, play_by_play, roster):
         away, away_emoji, home, home_emoji = get_teams_from_json(play_by_play)
 
         # Get the timing info for the goal to create the key
@@ -322,7 +409,7 @@ class Scoreboard(WesCog):
         shot_type = f" {event['details']['shotType']}," if "shotType" in event["details"] else ""
 
         # Get the scorer and assists
-        scorer = get_player_name_from_id(event["details"]["scoringPlayerId"], play_by_play["rosterSpots"])
+        scorer = get_player_name_from_id(event["details"]["scoringPlayerId"], roster)
         scorer += f" ({event['details']['scoringPlayerTotal']}"
 
         scorer += ")"
@@ -330,11 +417,11 @@ class Scoreboard(WesCog):
 
         goal_str = f"{get_emoji('goal')} GOAL{strength}{team} {time} {period_ord}: {scorer}"
         if "assist1PlayerId" in event["details"]:
-            goal_str += f" assists: {get_player_name_from_id(event['details']['assist1PlayerId'], play_by_play['rosterSpots'])} ({event['details']['assist1PlayerTotal']})"
+            goal_str += f" assists: {get_player_name_from_id(event['details']['assist1PlayerId'], roster)} ({event['details']['assist1PlayerTotal']})"
 
             # We'll only have an assist2 if we had an assist1
             if "assist2PlayerId" in event["details"]:
-                goal_str += f", {get_player_name_from_id(event['details']['assist2PlayerId'], play_by_play['rosterSpots'])} ({event['details']['assist2PlayerTotal']})"
+                goal_str += f", {get_player_name_from_id(event['details']['assist2PlayerId'], roster)} ({event['details']['assist2PlayerTotal']})"
         else:
             goal_str += " unassisted"
 
@@ -347,7 +434,7 @@ class Scoreboard(WesCog):
 
         return goal_str, highlight, score_str
 
-    async def check_disallowed_goals(self, game_id, play_by_play):
+    async def check_disallowed_goals(self, game_id, index):
         # TODO: Implement this based on what happens to a goal event when its disallowed.
         #       Challenge events exist, but unsure if they replace the goal one or if the goal one gets deleted.
         # [typeDescKey] == "stoppage" and [details][reason] = "chlg-vis-off-side", and the original goal even disappears
@@ -366,12 +453,15 @@ class Scoreboard(WesCog):
                 logged_message["content"]["title"].endswith("Starting."):
                 continue
 
-            found = list(filter(lambda event: (str(event["eventId"]) == logged_event_id), play_by_play["plays"]))
-            if len(found) == 0 or found[0]["typeDescKey"] != "goal":
+            found = index["by_id"].get(logged_event_id)
+            if found == None or found["typeDescKey"] != "goal":
                 # TODO: Edit with the actual reason for disallowing -- will involve scanning the rest of the events
                 # If we get here, we want to cross out that goal key and change it to a disallowed
                 await self.post_embed([game_id, "events"], logged_event_id, f"~~{logged_message['content']['title']}~~", logged_message["content"]["url"], f"~~{logged_message['content']['description']}~~")
 
+                # Forget the goal so it gets re-posted if it's ever reinstated
+                self.get_play_cursor(game_id)["goals"].pop(logged_event_id, None)
+
     async def check_ot_challenge(self, game_id, play_by_play):
         ot_key = "OT"
         away, away_emoji, home, home_emoji = get_teams_from_json(play_by_play)
@@ -486,21 +576,100 @@ class Scoreboard(WesCog):
         parent[key] = embed_dict
 
         # All these chanegs will affect self.messages, because of how assigining dicts to variables works
-        # So write it out to our datafile
-        async with self.messages_lock:
-            WriteJsonFile(messages_datafile, self.messages)
+        # So mark it to be written out to our datafile on the next flush
+        self.messages_writer.mark_dirty()
+
+    # Fetches and parses all of the games at once so a goal late in the slate posts as fast as an early one.
+    # Failures are logged per game, so one bad game can't hold up the rest.
+    async def parse_games(self, games):
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_GAMES)
+
+        async def parse_game_limited(game):
+            game_id = str(game["id"])
+            async with semaphore:
+                try:
+                    play_by_play = await self.parse_game(game)
+                except Exception as e:
+                    self.log.error(f"Error parsing game {game_id}: {type(e).__name__}: {e}")
+                    self.schedule_next_poll(game_id, POLL_LIVE_SECONDS)
+                    return None
+
+            # Postponed, cancelled, etc games won't be played today
+            if game["gameScheduleState"] != "OK":
+                self.schedule_next_poll(game_id, None)
+            elif play_by_play == None:
+                if game["gameState"] in ["FUT", "PRE"]:
+                    self.schedule_next_poll(game_id, get_pregame_poll_interval(game))
+                else:
+                    self.schedule_next_poll(game_id, POLL_LIVE_SECONDS)
+            elif self.is_game_complete(game_id):
+                self.log.info(f"Game {game_id} is complete. No longer polling it today.")
+                self.schedule_next_poll(game_id, None)
+            else:
+                self.schedule_next_poll(game_id, get_poll_interval(play_by_play))
+
+            return play_by_play
+
+        play_by_plays = await asyncio.gather(*[parse_game_limited(game) for game in games])
+
+        # Hand the fresh play-by-plays to the slash commands
+        play_by_plays = {str(game["id"]): play_by_play for game, play_by_play in zip(games, play_by_plays) if play_by_play != None}
+        if len(play_by_plays) > 0:
+            self.publish_snapshot(play_by_plays={**self.snapshot["play_by_plays"], **play_by_plays})
+
+    # Per-game cursor over the play-by-play, so each poll only formats and posts new or changed plays.
+    # sort_order is the highest play handled so far, and goals maps event_id -> fingerprint of the goal as last posted.
+    def get_play_cursor(self, game_id):
+        if game_id not in self.play_cursors:
+            self.play_cursors[game_id] = {"sort_order": -1, "goals": {}}
+        return self.play_cursors[game_id]
+
+    # Per-game roster lookups, built when the game first shows up and rebuilt only if the rosters change
+    def get_roster_index(self, game_id, play_by_play):
+        roster = self.rosters.get(game_id)
+        if roster == None or roster["key"] != get_roster_key(play_by_play["rosterSpots"]):
+            roster = build_roster_index(play_by_play["rosterSpots"])
+            self.rosters[game_id] = roster
+        return roster
+
+    # A game is done once the final has been posted with the recap video attached
+    def is_game_complete(self, game_id):
+        if game_id not in self.messages:
+            return False
+
+        for message in self.messages[game_id]["events"].values():
+            if message["content"]["title"].startswith("Final") and message["content"]["url"] != None:
+                return True
+
+        return False
 
+    # Returns the play-by-play that was parsed, or None if the game hasn't started or couldn't be fetched
     async def parse_game(self, game):
         state = game["gameState"]
         game_id = str(game["id"])
 
         # Early return to avoid doing work before a game has actually started
         if state not in ["LIVE", "CRIT", "OVER", "FINAL", "OFF"]:
-            return
+            return None
+
+        # If nothing that matters has changed on the scoreboard since the last fetch, re-parse the play-by-play we already
+        # have (it still picks up recap videos) and skip the download. It's always re-fetched every PLAY_BY_PLAY_REFRESH_SECONDS
+        # to catch highlight clips and disallowed goals, and on every poll in a possible OT Challenge window.
+        now = datetime.now(timezone.utc)
+        fingerprint = get_game_summary_fingerprint(game)
+        play_by_play = self.snapshot["play_by_plays"].get(game_id)
+        if play_by_play != None:
+            is_unchanged = self.summary_fingerprints.get(game_id) == fingerprint and now < self.next_play_by_play_fetch.get(game_id, now)
+            if not is_unchanged or is_ot_challenge_window(play_by_play):
+                play_by_play = None
 
-        play_by_play = make_api_call(f"https://api-web.nhle.com/v1/gamecenter/{game_id}/play-by-play", self.log)
         if play_by_play == None:
-            return
+            play_by_play = await make_api_call(f"https://api-web.nhle.com/v1/gamecenter/{game_id}/play-by-play", self.log)
+            if play_by_play == None:
+                return None
+
+            self.summary_fingerprints[game_id] = fingerprint
+            self.next_play_by_play_fetch[game_id] = now + timedelta(seconds=PLAY_BY_PLAY_REFRESH_SECONDS)
 
         away, away_emoji, home, home_emoji = get_teams_from_json(play_by_play)
         home_team_id = play_by_play["homeTeam"]["id"]
@@ -511,52 +680,56 @@ class Scoreboard(WesCog):
             self.messages[game_id] = {"awayTeam": away, "homeTeam": home, "events": {}}
 
         try:
-            await self.check_disallowed_goals(game_id, play_by_play)
+            index = index_play_by_play(play_by_play)
+            roster = self.get_roster_index(game_id, play_by_play)
+            await self.check_disallowed_goals(game_id, index)
             await self.check_ot_challenge(game_id, play_by_play)
 
             breadcrumbs = [game_id, "events"]
-            shootout_home_str = ""
-            shootout_away_str = ""
-            for event in play_by_play["plays"]:
-                event_id = str(event["eventId"])
+            cursor = self.get_play_cursor(game_id)
 
-                # Game Starting Message
-                if event["typeDescKey"] == "period-start" and event["periodDescriptor"]["number"] == 1:
-                    start_string = f"{away_emoji} {away} at {home_emoji} {home} Starting."
-                    await self.post_embed(breadcrumbs, event_id, start_string)
+            # Game Starting Message
+            event = index["game_start"]
+            if event != None and event["sortOrder"] > cursor["sort_order"]:
+                start_string = f"{away_emoji} {away} at {home_emoji} {home} Starting."
+                await self.post_embed(breadcrumbs, str(event["eventId"]), start_string)
 
-                # Goal Message
-                if event["typeDescKey"] == "goal":
-                    # Skip shootout goals because those are handled separately
-                    if event["periodDescriptor"]["periodType"] == "SO":
-                        continue
+            # Goal Messages
+            for event in index["goals"]:
+                event_id = str(event["eventId"])
 
-                    goal_str, highlight, score_str = self.format_goal_embed(event, play_by_play)
+                # Goals get edited after the fact (assists, highlights, scoring changes), so only
+                # re-format the ones whose content has changed since we last saw them.
+                fingerprint = get_play_fingerprint(event)
+                if cursor["goals"].get(event_id) != fingerprint:
+                    goal_str, highlight, score_str = self.format_goal_embed(event, play_by_play, roster)
                     await self.post_embed(breadcrumbs, event_id, goal_str, highlight, score_str)
+                    cursor["goals"][event_id] = fingerprint
 
-                if event["periodDescriptor"]["periodType"] == "SO":
-                    if event["typeDescKey"] in ["period-start", "shootout-complete", "period-end", "game-end"]:
-                        continue
+            # Game Ending Message
+            event = index["game_end"]
+            if event != None:
+                event_id = str(event["eventId"])
+
+                # Skip if we've already handled this and have the recap video.
+                if event_id not in self.messages[game_id]["events"] or self.messages[game_id]["events"][event_id]["content"]["url"] == None:
+                    end_string = self.format_game_end_embed(event, play_by_play)
+                    recap_link = await get_recap_link(game_id)
+                    await self.post_embed(breadcrumbs, event_id, end_string, recap_link)
 
+            # Shootout Message, rebuilt whenever there's a new attempt
+            if any(event["sortOrder"] > cursor["sort_order"] for event in index["shootout"]):
+                shootout_home_str = ""
+                shootout_away_str = ""
+                for event in index["shootout"]:
                     event_result = ":white_check_mark:" if event["typeDescKey"] == "goal" else ":x:"
-                    event_result += f" {get_player_name_from_id(event['details']['shootingPlayerId'])}"
+                    event_result += f" {get_player_name_from_id(event['details']['shootingPlayerId'], roster)}"
 
                     if event["details"]["eventOwnerTeamId"] == home_team_id:
                         shootout_home_str += event_result + "\n"
                     else:
                         shootout_away_str += event_result + "\n"
 
-                # Game Ending Message
-                if event["typeDescKey"] == "game-end":
-                    # Return if we've already handled this and have the recap video.
-                    if event_id in self.messages[game_id]["events"] and self.messages[game_id]["events"][event_id]["content"]["url"] != None:
-                        return
-
-                    end_string = self.format_game_end_embed(event, play_by_play)
-                    recap_link = get_recap_link(game_id)
-                    await self.post_embed(breadcrumbs, event_id, end_string, recap_link)
-
-            if shootout_home_str != "" or shootout_away_str != "":
                 title = f"Shootout: {away_emoji} {away} - {home} {home_emoji}"
                 shootout_away_str += "\u200b" # Zero-width character for spacing on mobile
                 fields = [
@@ -565,9 +738,14 @@ class Scoreboard(WesCog):
                 ]
                 await self.post_embed(breadcrumbs, "Shootout", title, fields=fields)
 
+            # Only move the cursor once everything up to here has been handled, so a failure gets retried next poll
+            cursor["sort_order"] = index["last_sort_order"]
+
         except Exception as e:
             self.log.error(f"ERROR: {e}")
 
+        return play_by_play
+
 #endregion
 #region Scoreboard Slash Commands
 
@@ -683,7 +861,7 @@ class Scoreboard(WesCog):
     async def playoffs(self, interaction: discord.Interaction):
         try:
             year = Config.config["year"]
-            playoffs = make_api_call(f"https://api-web.nhle.com/v1/playoff-series/carousel/{year}{int(year)+1}/", self.log)
+            playoffs = await make_api_call(f"https://api-web.nhle.com/v1/playoff-series/carousel/{year}{int(year)+1}/", self.log)
             if playoffs == None:
                 return
 
@@ -725,10 +903,15 @@ class Scoreboard(WesCog):
     @app_commands.default_permissions(send_messages=True)
     @app_commands.checks.has_permissions(send_messages=True)
     async def scoreboard(self, interaction: discord.Interaction):
+        # Render from what the scores loop last saw instead of going back to the APIs
+        snapshot = self.snapshot
+        if snapshot["updated"] == None:
+            await interaction.response.send_message("Scores haven't loaded yet. Try again in a few seconds.")
+            return
+
         msg = ""
         try:
-            games = await self.get_games_for_today()
-            for game in games:
+            for game in snapshot["games"]:
                 msg += self.get_score_string(game) + "\n"
         except Exception as e:
             await interaction.response.send_message(f"Error in NHL scores for `/scoreboard` function: {e}")
@@ -737,9 +920,9 @@ class Scoreboard(WesCog):
         try:
             for id, tourney_type in Config.config["active_iihf_tourneys"].items():
                 is_first_of_type = True
-                root = make_api_call(f"https://realtime.iihf.com/gamestate/GetLatestScoresState/{id}", self.log)
+                root = snapshot["iihf"].get(id)
                 if root == None:
-                    return
+                    continue
 
                 for game in root:
                     game_dt_utc = datetime.strptime(f"{game['GameDateTimeUTC']} +0000", "%Y-%m-%dT%H:%M:%SZ %z")
@@ -759,6 +942,7 @@ class Scoreboard(WesCog):
         if msg == "":
             msg = "No games found for today."
 
+        msg += f"\n*{self.get_snapshot_age_string(snapshot)}*"
         await interaction.response.send_message(msg)
 
     @app_commands.command(name="score", description="Check the score for a specific team.")
@@ -776,20 +960,24 @@ class Scoreboard(WesCog):
                 await interaction.response.send_message(f"Team '{team}' not found.")
                 return
 
-            # Loop through the games searching for this team
-            games = await self.get_games_for_today()
+            # Loop through the games searching for this team, using what the scores loop last saw
+            snapshot = self.snapshot
+            if snapshot["updated"] == None:
+                await interaction.response.send_message("Scores haven't loaded yet. Try again in a few seconds.")
+                return
+
             found = False
-            for game in games:
+            for game in snapshot["games"]:
                 if game["awayTeam"]["abbrev"] == team or game["homeTeam"]["abbrev"] == team:
                     found = True
                     msg = self.get_score_string(game)
-                    link = get_recap_link(str(game["id"]))
+                    link = get_cached_recap_link(game["id"])
                     break
 
             for id, tourney_type in Config.config["active_iihf_tourneys"].items():
-                root = make_api_call(f"https://realtime.iihf.com/gamestate/GetLatestScoresState/{id}", self.log)
+                root = snapshot["iihf"].get(id)
                 if root == None:
-                    return
+                    continue
 
                 for game in root:
                     if game["GuestTeam"]["TeamCode"] == team or game["HomeTeam"]["TeamCode"] == team:
@@ -807,6 +995,7 @@ class Scoreboard(WesCog):
 
             # Create and send the embed
             embed=discord.Embed(title=msg, url=link)
+            embed.set_footer(text=self.get_snapshot_age_string(snapshot))
             await interaction.response.send_message(embed=embed)
 
         except Exception as e:
@@ -861,8 +1050,11 @@ class Scoreboard(WesCog):
             await interaction.followup.send(f"Trouble finding game id for {team}. This should not happen.")
             return
 
-        play_by_play = make_api_call(f"https://api-web.nhle.com/v1/gamecenter/{game_id}/play-by-play", self.log)
+        # The loop's copy can be a poll or two behind, which is too old to decide whether the window has closed.
+        # Fetch it fresh instead. make_api_call coalesces this with the loop and any other guesses in flight.
+        play_by_play = await make_api_call(f"https://api-web.nhle.com/v1/gamecenter/{game_id}/play-by-play", self.log)
         if play_by_play == None:
+            await interaction.followup.send(f"Trouble loading this game. Try again in a few seconds.")
             return
 
         if not is_ot_challenge_window(play_by_play):
@@ -878,18 +1070,15 @@ class Scoreboard(WesCog):
             await interaction.followup.send(f"Trouble finding team {team} in play-by-play. This should not happen.")
             return
 
-        # Loop through the rosters in the play-by-play
+        # Look the guess up in this game's rosters
         player_name = player_num = None
         try:
             player_num = int(player)
         except:
             player_name = player.lower().strip()
 
-        found = False
-        for roster_player in play_by_play["rosterSpots"]:
-            if roster_player["teamId"] == team_id and (sanitize(roster_player["lastName"]["default"].lower()) == player_name or sanitize(f"{roster_player['firstName']['default']} {roster_player['lastName']['default']}".lower()) == player_name or roster_player["sweaterNumber"] == player_num):
-                found = True
-                break
+        roster_player = find_player_in_roster(self.get_roster_index(game_id, play_by_play), team_id, player_name, player_num)
+        found = roster_player != None
 
         if found:
             async with self.ot_lock:
@@ -923,7 +1112,7 @@ class Scoreboard(WesCog):
                 await interaction.followup.send("No OT Challenge standings found.", ephemeral=True)
                 return
 
-            ot_standings = LoadJsonFile(otstandings_datafile)
+            ot_standings = LoadJsonFile(otstandings_datafile, cached=True)
 
         guild_id = str(interaction.guild_id)
         if guild_id not in ot_standings:
@@ -933,9 +1122,9 @@ class Scoreboard(WesCog):
         message = "Updates every night at noon EST.\n"
         message += "```{:<15} {:>4} {:>4}\n\n".format("User", "✅", "Tot")
 
-        if "role" in ot_standings[guild_id]:
-            del ot_standings[guild_id]["role"]
-        standings = sorted(ot_standings[guild_id].items(), key=lambda x:(x[1]["correct"], -x[1]["guesses"]), reverse=True)
+        # Skip the role entry without deleting it, since the loaded standings are shared with the datafile cache
+        standings = [(user_id, user) for user_id, user in ot_standings[guild_id].items() if user_id != "role"]
+        standings = sorted(standings, key=lambda x:(x[1]["correct"], -x[1]["guesses"]), reverse=True)
         for user in standings:
             message += "{:<16} {:>4} {:>4}\n".format(user[1]["name"][:14], user[1]["correct"], user[1]["guesses"])
 
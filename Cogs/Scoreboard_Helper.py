@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+import asyncio
 import time
 
 from Shared import *
@@ -43,12 +45,71 @@ def get_goal_strength(event, is_home_team):
 
     return strength
 
-def get_player_name_from_id(player_id, rosters):
-    for player in rosters:
-        if player["playerId"] == player_id:
-            return player["firstName"]["default"] + " " + player["lastName"]["default"]
+# Cheap key for telling whether a game's rosters have changed since the index was built
+def get_roster_key(roster_spots):
+    return tuple((player["playerId"], player["teamId"], player.get("sweaterNumber")) for player in roster_spots)
 
-    return "UNKNOWN PLAYER"
+# Builds the lookups for a game's rosters once, so scorers and OT Challenge guesses
+# don't each need a scan of rosterSpots. If two players share a name or number, the first one wins.
+def build_roster_index(roster_spots):
+    index = {"key": get_roster_key(roster_spots), "names": {}, "teams": {}}
+
+    for player in roster_spots:
+        full_name = player["firstName"]["default"] + " " + player["lastName"]["default"]
+        index["names"][player["playerId"]] = full_name
+
+        if player["teamId"] not in index["teams"]:
+            index["teams"][player["teamId"]] = {"last_name": {}, "full_name": {}, "number": {}}
+        team = index["teams"][player["teamId"]]
+
+        team["last_name"].setdefault(sanitize(player["lastName"]["default"].lower()), player)
+        team["full_name"].setdefault(sanitize(full_name.lower()), player)
+        if "sweaterNumber" in player:
+            team["number"].setdefault(player["sweaterNumber"], player)
+
+    return index
+
+def get_player_name_from_id(player_id, roster_index):
+    return roster_index["names"].get(player_id, "UNKNOWN PLAYER")
+
+# Finds a player on the given team by sanitized lower-case last name, full name, or sweater number
+def find_player_in_roster(roster_index, team_id, player_name=None, player_num=None):
+    if team_id not in roster_index["teams"]:
+        return None
+
+    team = roster_index["teams"][team_id]
+    if player_num != None:
+        return team["number"].get(player_num)
+
+    player_name = sanitize(player_name)
+    return team["last_name"].get(player_name) or team["full_name"].get(player_name)
+
+# Indexes the play-by-play in a single pass, so the disallowed goal check, goal formatting, and shootout
+# don't each have to scan every play on every poll.
+def index_play_by_play(play_by_play):
+    index = {"by_id": {}, "game_start": None, "game_end": None, "goals": [], "shootout": [], "last_sort_order": -1}
+
+    for event in play_by_play["plays"]:
+        index["by_id"][str(event["eventId"])] = event
+        index["last_sort_order"] = max(index["last_sort_order"], event["sortOrder"])
+
+        type = event["typeDescKey"]
+        period_type = event["periodDescriptor"]["periodType"]
+        if type == "period-start" and event["periodDescriptor"]["number"] == 1:
+            index["game_start"] = event
+        elif type == "game-end":
+            index["game_end"] = event
+        elif period_type == "SO":
+            if type not in ["period-start", "shootout-complete", "period-end"]:
+                index["shootout"].append(event)
+        elif type == "goal":
+            index["goals"].append(event)
+
+    return index
+
+# Snapshot of everything about a play, used to tell if the NHL has edited it since we last saw it
+def get_play_fingerprint(event):
+    return json.dumps(event, sort_keys=True)
 
 def is_ot_challenge_window(play_by_play):
     if play_by_play["gameState"] not in ["LIVE", "CRIT"]:
@@ -76,13 +137,83 @@ def is_ot_challenge_window(play_by_play):
 
     return False
 
+# Returns how many seconds to wait before polling a started game again, based on its current state
+def get_poll_interval(play_by_play):
+    state = play_by_play["gameState"]
+    if state not in ["LIVE", "CRIT"]:
+        return POLL_FINAL_SECONDS
+
+    # OT Challenge guesses close fast, so keep a close eye on these
+    if is_ot_challenge_window(play_by_play):
+        return POLL_FAST_SECONDS
+
+    if "clock" in play_by_play and play_by_play["clock"]["inIntermission"]:
+        return POLL_INTERMISSION_SECONDS
+
+    # Close games late and anything in OT
+    period = play_by_play["periodDescriptor"]["number"] if "periodDescriptor" in play_by_play else 1
+    score_diff = abs(play_by_play["homeTeam"].get("score", 0) - play_by_play["awayTeam"].get("score", 0))
+    if state == "CRIT" or period > 3 or (period == 3 and score_diff <= 1):
+        return POLL_FAST_SECONDS
+
+    return POLL_LIVE_SECONDS
+
+# Fingerprint of the parts of a /scoreboard/now game that mean its play-by-play probably has something new:
+# state, score, shots, period, intermission, and whether it's late in the 3rd (a possible OT Challenge window)
+def get_game_summary_fingerprint(game):
+    clock = game.get("clock", {})
+    period = game.get("periodDescriptor", {}).get("number", game.get("period"))
+    is_near_end_of_third = period == 3 and not clock.get("inIntermission", False) and clock.get("secondsRemaining", 20*60) < 60*OT_CHALLENGE_BUFFER_MINUTES
+
+    return (game.get("gameState"), game["awayTeam"].get("score"), game["homeTeam"].get("score"), game["awayTeam"].get("sog"), game["homeTeam"].get("sog"),
+            period, clock.get("inIntermission"), is_near_end_of_third)
+
+# Returns how many seconds to wait before polling a game that hasn't started yet.
+# Sleeps until shortly before the scheduled start, then polls at the normal cadence until it goes live.
+def get_pregame_poll_interval(game):
+    start_time = datetime.strptime(f"{game['startTimeUTC']} +0000", "%Y-%m-%dT%H:%M:%SZ %z")
+    seconds_until_start = (start_time - datetime.now(timezone.utc)).total_seconds()
+
+    return max(seconds_until_start - PREGAME_LEAD_SECONDS, POLL_LIVE_SECONDS)
+
+# Recap video links by game id, pulled from /score/now. Once a game has a recap it never changes, so
+# we only go back to the API (at most once per RECAP_CACHE_TTL_SECONDS) for games that are still missing one.
+recap_cache = {"fetched": None, "links": {}, "fetch": None}
+
+# Called on date rollover so the links don't pile up all season
+def clear_recap_cache():
+    recap_cache["fetched"] = None
+    recap_cache["links"] = {}
+
+async def fetch_recap_links():
+    scoreboard = await make_api_call(f"https://api-web.nhle.com/v1/score/now")
+    for game in scoreboard["games"]:
+        if "threeMinRecap" in game:
+            video_id = game["threeMinRecap"].split("-")[-1]
+            recap_cache["links"][game["id"]] = f"{MEDIA_LINK_BASE}{video_id}"
+    # Only counts once the fetch actually finished, so a failed one gets retried next poll
+    recap_cache["fetched"] = time.monotonic()
+
+# Same as get_recap_link, but never calls the API. For commands that should answer instantly.
+def get_cached_recap_link(id):
+    return recap_cache["links"].get(int(id))
+
 # Gets the game recap video link if it's available
-def get_recap_link(id):
+async def get_recap_link(id):
+    id = int(id)
+    if id in recap_cache["links"]:
+        return recap_cache["links"][id]
+
+    if recap_cache["fetched"] != None and time.monotonic() - recap_cache["fetched"] < RECAP_CACHE_TTL_SECONDS:
+        return None
+
+    # Every game finishing in the same poll waits on the same fetch instead of getting None
+    if recap_cache["fetch"] == None or recap_cache["fetch"].done():
+        recap_cache["fetch"] = asyncio.ensure_future(fetch_recap_links())
+
     try:
-        scoreboard = make_api_call(f"https://api-web.nhle.com/v1/score/now")
-        for game in scoreboard["games"]:
-            if game["id"] == int(id):
-                video_id = game["threeMinRecap"].split("-")[-1]
-                return f"{MEDIA_LINK_BASE}{video_id}"
+        await asyncio.shield(recap_cache["fetch"])
     except:
         return None
+
+    return recap_cache["links"].get(id)
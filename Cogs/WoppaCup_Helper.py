@@ -1,4 +1,5 @@
 import challonge
+from datetime import datetime, timezone
 import discord
 
 from Shared import *
@@ -6,57 +7,26 @@ from Shared import *
 class WoppaCup():
     has_tournament_started = True
 
+    # Latest result of load_snapshot. Refreshed in the background by OTH.woppacup_loop.
+    snapshot = None
+
+    # Pages come pre-rendered in the snapshot, so every open pager shares them and a click just swaps embeds
     class WCView(discord.ui.View):
-        def __init__(self):
+        def __init__(self, snapshot):
             super().__init__()
 
-            # Get info about the tournament
-            self.participants, self.matches, self.url, self.winner, self.tourney_name = WoppaCup.get_wc_data()
-            self.curr_round, self.is_group_stage = WoppaCup.get_round_and_stage(self.matches)
-            if self.winner != None:
-                for p in self.participants:
-                    if self.winner == p["id"]:
-                        self.winner = p["name"].split(".")[-1]
-                        break
-
-            self.matches = WoppaCup.trim_matches(self.matches, self.curr_round, self.is_group_stage)
-            self.round_name = WoppaCup.get_round_name(self.matches[0]) if len(self.matches) > 0 else None
-
-            # Group stage has 3 matches per group, so display them together
-            # Knockout round display 4 for bracket purposes
-            self.matches_per_page = 3 if self.is_group_stage else 4
             self.current = 0
-            self.embed = None
-
-            self.update_embed()
+            self.embed = snapshot["pages"][0]
 
-            # Remove the buttons if there's only one page
-            if len(self.matches) <= self.matches_per_page:
-                self.clear_items()
+        # The buttons get removed if there's only one page
+        def is_single_page(self):
+            return len(WoppaCup.snapshot["pages"]) <= 1
 
+        # Always read the latest snapshot, so views that were opened before a refresh pick up the new scores
         def update_embed(self):
-            if self.winner != None:
-                self.embed = discord.Embed(title=self.tourney_name, description=f"The tournament is over. Congrats to {self.winner}!", url=self.url)
-                return
-
-            # Wraparound
-            if self.current == -1:
-                self.current = int(len(self.matches)/self.matches_per_page-1)
-            if self.current == len(self.matches)/self.matches_per_page:
-                self.current = 0
-
-            # First and last match to be displayed on this page
-            start_match = self.current * self.matches_per_page
-            end_match = (self.current + 1) * self.matches_per_page
-            group_name = chr(65 + self.current) if self.current <= 26 else "A" + chr(65 - 26 + self.current)
-
-            self.embed = discord.Embed(title=f"{self.tourney_name} {self.round_name.replace("Stage", group_name)}", url=self.url)
-            for m in self.matches[start_match:end_match]:
-                self.embed.add_field(name="", value=WoppaCup.get_description_for_woppacup_embed(m, self.participants), inline=False)
-
-            # Add a page count to the footer
-            if len(self.matches) > self.matches_per_page:
-                self.embed.set_footer(text=f"{self.current+1}/{int(len(self.matches)/self.matches_per_page)}", icon_url=None)
+            pages = WoppaCup.snapshot["pages"]
+            self.current %= len(pages) # wraparound
+            self.embed = pages[self.current]
 
         @discord.ui.button(label="Prev", style=discord.ButtonStyle.green)
         async def prev(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
@@ -84,6 +54,102 @@ class WoppaCup():
 
         return participants, matches, tourney["full_challonge_url"], matches[-1]["winner_id"], tourney["name"]
 
+    # Pulls everything the commands need from Challonge and indexes it, so they can answer from memory.
+    # Blocking, so call it off the event loop.
+    def load_snapshot():
+        participants, matches, url, winner, tourney_name = WoppaCup.get_wc_data()
+        curr_round, is_group_stage = WoppaCup.get_round_and_stage(matches)
+        round_matches = WoppaCup.trim_matches(matches, curr_round, is_group_stage)
+
+        # Matches refer to participants by id in the knockout rounds and by group player id in the group stage,
+        # and commands look them up by fleaflicker username
+        participants_by_player = {}
+        participants_by_name = {}
+        for p in participants:
+            for player_id in [p["id"]] + p["group_player_ids"]:
+                participants_by_player[player_id] = p
+            participants_by_name.setdefault(p["name"].lower().split(".")[-1], p)
+
+        if winner in participants_by_player:
+            winner = participants_by_player[winner]["name"].split(".")[-1]
+
+        # This round's matches keyed by both players. Group stage matches use the group player ids.
+        matches_by_player = {}
+        for m in round_matches:
+            for player_id in [m["player1_id"], m["player2_id"]]:
+                if player_id != None:
+                    matches_by_player[player_id] = m
+
+        snapshot = {
+            "participants": participants,
+            "matches": matches,
+            "url": url,
+            "winner": winner,
+            "tourney_name": tourney_name,
+            "curr_round": curr_round,
+            "is_group_stage": is_group_stage,
+            "round_matches": round_matches,
+            "participants_by_player": participants_by_player,
+            "participants_by_name": participants_by_name,
+            "matches_by_player": matches_by_player,
+            "fetched": datetime.now(timezone.utc)
+        }
+
+        return snapshot
+
+    # Single page shown in the /wc_all pager in place of the scores
+    def get_message_page(snapshot, description):
+        return discord.Embed(title=snapshot["tourney_name"], description=description, url=snapshot["url"])
+
+    # Renders every /wc_all page for the snapshot. Kept separate from load_snapshot so a bad matchup
+    # in the database can't stop the other commands from getting a snapshot. Blocking, so call it off the event loop.
+    def render_pages(snapshot):
+        if snapshot["winner"] != None:
+            return [WoppaCup.get_message_page(snapshot, f"The tournament is over. Congrats to {snapshot['winner']}!")]
+
+        matches = snapshot["round_matches"]
+        if len(matches) == 0:
+            return [WoppaCup.get_message_page(snapshot, "No matches this round.")]
+
+        participants_by_player = snapshot["participants_by_player"]
+        matchups = WoppaCup.get_matchups_for_matches(matches, participants_by_player)
+        round_name = WoppaCup.get_round_name(matches[0])
+
+        # Group stage has 3 matches per group, so display them together
+        # Knockout round display 4 for bracket purposes
+        matches_per_page = 3 if snapshot["is_group_stage"] else 4
+        num_pages = (len(matches) + matches_per_page - 1) // matches_per_page
+
+        pages = []
+        for page in range(num_pages):
+            group_name = chr(65 + page) if page <= 26 else "A" + chr(65 - 26 + page)
+
+            # Timestamp shows up in the footer in each user's own timezone
+            embed = discord.Embed(title=f"{snapshot['tourney_name']} {round_name.replace("Stage", group_name)}", url=snapshot["url"], timestamp=snapshot["fetched"])
+            for m in matches[page*matches_per_page:(page+1)*matches_per_page]:
+                # One missing or duplicated matchup shouldn't take down the rest of the page
+                try:
+                    value = WoppaCup.get_description_for_woppacup_embed(m, participants_by_player, matchups)
+                except (UserNotFound, MultipleMatchupsFound) as e:
+                    p1_name, p1_div, p2_name, p2_div = WoppaCup.get_match_players(m, participants_by_player)
+                    value = f"`{p1_name}` vs `{p2_name}`: {e.message}"
+                embed.add_field(name="", value=value, inline=False)
+
+            # Add a page count to the footer
+            footer = f"{page+1}/{num_pages} \u2022 " if num_pages > 1 else ""
+            embed.set_footer(text=f"{footer}Scores updated", icon_url=None)
+            pages.append(embed)
+
+        return pages
+
+    # Finds this round's match for a participant, or None if they're on bye or eliminated
+    def get_match_for_participant(participant, snapshot):
+        for player_id in [participant["id"]] + participant["group_player_ids"]:
+            match = snapshot["matches_by_player"].get(player_id)
+            if match != None:
+                return match
+        return None
+
     def trim_matches(matches, round, is_group_stage):
         matching_matches = []
         for m in matches:
@@ -148,10 +214,48 @@ class WoppaCup():
 
         return 999, False
 
-    def get_description_for_woppacup_embed(match, participants):
-        p1_id = match["player1_id"]
-        p2_id = match["player2_id"]
+    # Returns (p1_name, p1_div, p2_name, p2_div) for a match
+    # participants_by_player comes from the snapshot
+    def get_match_players(match, participants_by_player):
         p1_name = p2_name = p1_div = p2_div = None
+
+        p1 = participants_by_player.get(match["player1_id"])
+        if p1 != None:
+            p1_div = p1["name"].split(".")[0]
+            p1_name = p1["name"].split(".")[-1]
+
+        p2 = participants_by_player.get(match["player2_id"])
+        if p2 != None:
+            p2_div = p2["name"].split(".")[0]
+            p2_name = p2["name"].split(".")[-1]
+
+        return p1_name, p1_div, p2_name, p2_div
+
+    # Gets the fleaflicker matchups for both players of every match with one database query.
+    # Blocking, so call it off the event loop.
+    def get_matchups_for_matches(matches, participants_by_player):
+        users = []
+        for m in matches:
+            p1_name, p1_div, p2_name, p2_div = WoppaCup.get_match_players(m, participants_by_player)
+
+            # Skip empty slots (byes, or waiting on the previous round)
+            users.extend([(name, div) for name, div in [(p1_name, p1_div), (p2_name, p2_div)] if name != None])
+
+        return get_user_matchups_from_database(users)
+
+    def get_matchup_for_player(name, division, matchups):
+        if name == None:
+            raise UserNotFound(name, division)
+
+        matchup = matchups.get((sanitize_user(name), division.lower()), [])
+        if len(matchup) == 0:
+            raise UserNotFound(name, division)
+        if len(matchup) > 1:
+            raise MultipleMatchupsFound(name)
+        return matchup[0]
+
+    # matchups comes from get_matchups_for_matches, and needs to include both players in this match
+    def get_description_for_woppacup_embed(match, participants_by_player, matchups):
         p1_prev = p2_prev = 0
 
         # Check for existing scores
@@ -160,34 +264,9 @@ class WoppaCup():
             p1_prev = int(scores[0])/100.0
             p2_prev = int(scores[1])/100.0
 
-        # Get the particpants from the participants list
-        for p in participants:
-            if p1_id == p["id"] or p1_id in p["group_player_ids"]:
-                p1_div = p["name"].split(".")[0]
-                p1_name = p["name"].split(".")[-1]
-            elif p2_id == p["id"] or p2_id in p["group_player_ids"]:
-                p2_div = p["name"].split(".")[0]
-                p2_name = p["name"].split(".")[-1]
-
-            # Found both names!
-            if p1_name != None and p2_name != None:
-                break
-
-        # Get p1's matchup from the database
-        p1_matchup = get_user_matchup_from_database(p1_name, p1_div)
-        if len(p1_matchup) == 0:
-            raise UserNotFound(p1_name, p1_div)
-        if len(p1_matchup) > 1:
-            raise MultipleMatchupsFound(p1_name)
-        p1_matchup = p1_matchup[0]
-
-        # Get p2's matchup from the database
-        p2_matchup = get_user_matchup_from_database(p2_name, p2_div)
-        if len(p2_matchup) == 0:
-            raise UserNotFound(p2_name, p2_div)
-        if len(p2_matchup) > 1:
-            raise MultipleMatchupsFound(p2_name)
-        p2_matchup = p2_matchup[0]
+        p1_name, p1_div, p2_name, p2_div = WoppaCup.get_match_players(match, participants_by_player)
+        p1_matchup = WoppaCup.get_matchup_for_player(p1_name, p1_div, matchups)
+        p2_matchup = WoppaCup.get_matchup_for_player(p2_name, p2_div, matchups)
 
         # Format names for posting
         p1_name = f"{p1_div[:8]}.{p1_name}"
@@ -204,6 +283,8 @@ class WoppaCup():
         return msg
 
     # Creates an embed for a given woppa cup matchup
-    def get_embed_for_woppacup_match(match, participants, url):
-        embed = discord.Embed(title=f"{self.tourney_name} {WoppaCup.get_round_name(match)}", description=WoppaCup.get_description_for_woppacup_embed(match, participants), url=url)
+    def get_embed_for_woppacup_match(match, snapshot):
+        participants_by_player = snapshot["participants_by_player"]
+        matchups = WoppaCup.get_matchups_for_matches([match], participants_by_player)
+        embed = discord.Embed(title=f"{snapshot['tourney_name']} {WoppaCup.get_round_name(match)}", description=WoppaCup.get_description_for_woppacup_embed(match, participants_by_player, matchups), url=snapshot["url"])
         return embed
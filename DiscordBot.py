@@ -1,4 +1,5 @@
 # Python Libaries
+import asyncio
 from datetime import datetime, timezone
 import logging
 from logging.handlers import RotatingFileHandler
@@ -66,6 +67,15 @@ class Wes(commands.Bot):
         for cog in Shared.all_cogs:
             await bot.load_extension(cog)
 
+        Shared.telemetry_loop.start()
+
+    async def close(self):
+        await super(Wes, self).close()
+        Shared.telemetry_loop.cancel()
+        await asyncio.to_thread(Shared.flush_telemetry)
+        await Shared.close_http_session()
+        Shared.db_pool.close()
+
 # https://discordpy.readthedocs.io/en/stable/intents.html
 intents = discord.Intents.default()
 intents.members = True # Needed for high accuracy cache on Guild.members and Member.roles (used for OTH roles)
@@ -1,15 +1,24 @@
 # Discord Libraries
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 # Python Libraries
+import aiohttp
+import asyncio
+from cachetools import TTLCache
 from datetime import datetime
 import glob
 import json
+import logging
 import os
+from contextlib import asynccontextmanager, contextmanager
 import pymysql
-import requests
+import queue
+import re
+import threading
+import time
 import traceback
+import unicodedata
 from urllib.parse import urlparse
 
 # Local Includes
@@ -158,6 +167,35 @@ OTH_OT_ROLE_ID = 1206140465641168986
 MIN_INACTIVE_DAYS = 7 # Number of days where we deem a team to be "inactive" on fleaflicker
 OT_CHALLENGE_BUFFER_MINUTES = 5 # Mintues left in the 3rd at which OT challenge submissions are accepted
 ROLLOVER_HOUR_UTC = 11 # 11am UTC = 6am EST = 3am PST
+HTTP_TIMEOUT_SECONDS = 15 # Total time allowed for a single API call, including connecting and reading the body
+HTTP_CONNECT_TIMEOUT_SECONDS = 5 # Time allowed to get a connection from the pool and connect to the host
+HTTP_MAX_CONNECTIONS = 30 # Size of the shared connection pool
+HTTP_MAX_CONNECTIONS_PER_HOST = 10 # Keep-alive connections held open to any one host
+MAX_CONCURRENT_GAMES = 8 # Number of games the scoreboard fetches and parses at the same time
+SCORES_LOOP_TICK_SECONDS = 5 # How often the scores loop wakes up to check whether any game is due to be polled
+POLL_FAST_SECONDS = 10 # Close games late in the 3rd, OT, and OT Challenge windows
+POLL_LIVE_SECONDS = 30 # Normal in-game cadence
+POLL_INTERMISSION_SECONDS = 90 # Nothing happens in intermission, so back off
+POLL_FINAL_SECONDS = 60 # Waiting on the final and the recap video after the game ends
+PREGAME_LEAD_SECONDS = 5*60 # Start polling a game this long before its scheduled start time
+SCOREBOARD_IDLE_SECONDS = 10*60 # Max time between scoreboard refreshes when no games are due (date rollover, postponements, etc)
+IIHF_POLL_SECONDS = 30 # Cadence for the IIHF tournaments, which don't have per-game scheduling
+PLAY_BY_PLAY_REFRESH_SECONDS = 2*60 # Max time a game's play-by-play goes without a fetch when its scoreboard summary hasn't changed (highlights, disallowed goals, etc)
+TELEMETRY_FLUSH_SECONDS = 60 # How often API telemetry is written to the database
+TELEMETRY_MAX_FAILED_FLUSHES = 10 # Failed flushes in a row before unwritten telemetry is dropped instead of kept for the next one
+DB_POOL_SIZE = 4 # Max number of open MySQL connections shared by all of the database helpers
+MESSAGES_FLUSH_SECONDS = 5 # Max time scoreboard message state sits in memory before it's written to disk
+RECAP_CACHE_TTL_SECONDS = 60 # How long a /score/now payload is trusted when looking for recap videos that haven't shown up yet
+WOPPACUP_REFRESH_SECONDS = 5*60 # How often the Woppa Cup snapshot is pulled from Challonge in the background
+WOPPACUP_SNAPSHOT_TTL_SECONDS = 15*60 # Max age of the Woppa Cup snapshot before a command refreshes it on demand
+SCRAPE_MAX_CONCURRENT_REQUESTS = 6 # Page loads in flight at once when scraping fleaflicker team pages
+SCRAPE_REQUESTS_PER_SECOND = 4 # Max page loads started per second against any one host when scraping
+LEAGUE_CACHE_TTL_SECONDS = 6*60*60 # Leagues, users, and team owners only change a few times a season
+CURRENT_PF_REFRESH_SECONDS = 10*60 # How often the fleaflicker current week PF script runs in the background
+CURRENT_PF_MAX_AGE_SECONDS = 15*60 # Max age of current week PF before /matchup runs the script itself. Keep this above CURRENT_PF_REFRESH_SECONDS.
+FANTASY_SEASON_MONTHS = [9, 10, 11, 12, 1] # Months the fleaflicker season runs (kickoff through the fantasy playoffs)
+API_CACHE_MAX_STALE_SECONDS = 6*60*60 # How long past its TTL a cached API response can still be served while refreshing it or if the API is down
+FINISHED_GAME_CACHE_SECONDS = 24*60*60 # TTL for API responses about games that are already over
 
 all_cogs = ["Cogs.Debug",
             "Cogs.KeepingKarlsson",
@@ -211,26 +249,141 @@ class MultipleMatchupsFound(discord.ext.commands.CommandError):
 
 #region Database helper functions
 
-DB = pymysql.connect(host=Config.config["sql_hostname"], user=Config.config["sql_username"], passwd=Config.config["sql_password"], db=Config.config["sql_dbname"], cursorclass=pymysql.cursors.DictCursor)
-DB.autocommit(True)
+# Small pool of MySQL connections shared by every database helper. Connections are opened lazily, and each one
+# is pinged before it's handed out, which reconnects it if MySQL dropped it for sitting idle.
+# The helpers are blocking, so call them with asyncio.to_thread from the event loop.
+class DatabasePool():
+    def __init__(self, size):
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    def connect(self):
+        return pymysql.connect(host=Config.config["sql_hostname"], user=Config.config["sql_username"], passwd=Config.config["sql_password"], db=Config.config["sql_dbname"], cursorclass=pymysql.cursors.DictCursor, autocommit=True, connect_timeout=5)
+
+    @contextmanager
+    def connection(self):
+        self.slots.acquire()
+        connection = None
+        try:
+            try:
+                connection = self.idle.get_nowait()
+                connection.ping(reconnect=True)
+            except queue.Empty:
+                connection = self.connect()
+
+            yield connection
+
+            self.idle.put(connection)
+            connection = None
+        finally:
+            # Anything that raised gets its connection thrown away instead of going back in the pool
+            if connection != None:
+                try:
+                    connection.close()
+                except:
+                    pass
+            self.slots.release()
+
+    def close(self):
+        while not self.idle.empty():
+            try:
+                self.idle.get_nowait().close()
+            except:
+                pass
+
+# Kept across importlib.reload(Shared) so reloading cogs doesn't leave old connections open
+if "db_pool" not in globals():
+    db_pool = DatabasePool(DB_POOL_SIZE)
+
+# Runs a query on a pooled connection and returns all rows, one row, or nothing depending on fetch.
+# Retries once on a fresh connection if the connection died underneath us.
+def query_database(query, params=(), fetch="all"):
+    for attempt in range(2):
+        try:
+            with db_pool.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(query, params)
+                    if fetch == "all":
+                        return cursor.fetchall()
+                    if fetch == "one":
+                        return cursor.fetchone()
+                    return None
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            if attempt == 1:
+                raise
+
+# Read-through cache for lookups on tables that rarely change. Values expire after ttl seconds, or can be
+# dropped early with invalidate() when we know the tables changed. The database helpers run on worker threads,
+# so the cache is guarded by a lock, but the load itself runs outside of it.
+class ReadThroughCache():
+    def __init__(self, name, maxsize, ttl):
+        self.name = name
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.lock = threading.Lock()
+
+    # Returns a dict of key -> value for every key, calling load_many(missing_keys) once for the ones that
+    # aren't cached. load_many returns a dict. Keys it leaves out come back as None but aren't cached,
+    # so something added to the tables mid-season shows up on the next lookup instead of after the ttl.
+    def get_many(self, keys, load_many):
+        found = {}
+        with self.lock:
+            for key in keys:
+                if key in self.cache:
+                    found[key] = self.cache[key]
+        missing = [key for key in keys if key not in found]
+        log_cache_telemetry(self.name, len(found), len(missing))
+
+        if len(missing) > 0:
+            loaded = load_many(missing)
+            with self.lock:
+                for key in missing:
+                    found[key] = loaded.get(key)
+                    if found[key] != None:
+                        self.cache[key] = found[key]
+
+        return found
+
+    def get(self, key, load):
+        return self.get_many([key], lambda keys: {key: load()})[key]
+
+    def invalidate(self, key=None):
+        with self.lock:
+            if key == None:
+                self.cache.clear()
+            else:
+                self.cache.pop(key, None)
+
+# Kept across importlib.reload(Shared) so a reload doesn't throw away everything we've cached
+if "league_caches" not in globals():
+    league_caches = {
+        "leagues": ReadThroughCache("leagues", 32, LEAGUE_CACHE_TTL_SECONDS), # year -> list of leagues
+        "owners": ReadThroughCache("owners", 4096, LEAGUE_CACHE_TTL_SECONDS)  # (year, teamID) -> owner's FFname
+    }
+
+# Call this after changing the Leagues, Users, or Teams tables (new season, ownership changes, etc)
+def invalidate_league_caches():
+    for cache in league_caches.values():
+        cache.invalidate()
 
 def get_owner_for_team(year, team_id):
-    cursor = DB.cursor()
-    cursor.execute("SELECT U.FFname from Teams T INNER JOIN Users U on T.ownerID = U.FFid where year=%s AND teamID=%s", (year, team_id))
-    owner = cursor.fetchone()
-    cursor.close()
+    owner = get_owners_for_teams(year, [team_id]).get(team_id)
+    return {"FFname": owner} if owner != None else None
+
+# Same as get_owner_for_team for a bunch of teams at once, with one query for any that aren't cached.
+# Returns a dict of teamID -> FFname.
+def get_owners_for_teams(year, team_ids):
+    def load_owners(keys):
+        placeholders = ",".join(["%s"]*len(keys))
+        rows = query_database(f"SELECT T.teamID, U.FFname from Teams T INNER JOIN Users U on T.ownerID = U.FFid where year=%s AND teamID IN ({placeholders})", (year, *[key[1] for key in keys]))
+        return {(year, row["teamID"]): row["FFname"] for row in rows}
 
-    return owner
+    owners = league_caches["owners"].get_many(list({(year, team_id) for team_id in team_ids}), load_owners)
+    return {key[1]: owner for key, owner in owners.items() if owner != None}
 
 # Grabs the list of OTH leagues for the given year
 # from the SQL database
 def get_leagues_from_database(year):
-    cursor = DB.cursor()
-    cursor.execute("SELECT id, name from Leagues where year=%s", (year,))
-    leagues = cursor.fetchall()
-    cursor.close()
-
-    return leagues
+    return league_caches["leagues"].get(year, lambda: query_database("SELECT id, name from Leagues where year=%s", (year,)))
 
 def sanitize_user(user):
     user = user.lower()
@@ -253,26 +406,32 @@ def sanitize_user(user):
 
     return user
 
+# Close enough to MySQL's case and accent insensitive collation for matching query results back to what was asked for
+def collate(text):
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)).casefold()
+
+# Everything we show for a matchup, for one team and its current opponent
+matchup_query = """
+    SELECT l.name as league_name, l.tier as tier, me_u.FFname as name, me.currentWeekPF as PF, opp_u.FFname as opp_name, opp.currentWeekPF as opp_PF,
+        me.leagueID as league_id, me.matchupID as matchup_id, me.wins as wins, me.losses as losses, opp.wins as opp_wins, opp.losses as opp_losses, me.year as year,
+        me_r.ranking as ranking, opp_r.ranking as opp_ranking
+        FROM Teams AS me
+        LEFT JOIN Teams AS opp ON (me.CurrOpp=opp.teamID AND me.year=opp.year)
+        INNER JOIN Users AS me_u ON me.ownerID=me_u.FFid
+        LEFT JOIN Users AS opp_u ON opp.ownerID=opp_u.FFid
+        LEFT JOIN TeamRankings AS me_r ON (me.teamID=me_r.teamID AND me.year=me_r.year)
+        LEFT JOIN TeamRankings AS opp_r ON (opp.teamID=opp_r.teamID AND opp.year=opp_r.year)
+        INNER JOIN Leagues AS l ON (me.leagueID=l.id AND me.year=l.year)
+"""
+
 # Grabs the current score and opponent's current score for the given username
 def get_user_matchup_from_database(user, division=None):
     user = sanitize_user(user)
 
-    cursor = DB.cursor()
-
     year = Config.config["year"]
 
-    query = """
-        SELECT l.name as league_name, l.tier as tier, me_u.FFname as name, me.currentWeekPF as PF, opp_u.FFname as opp_name, opp.currentWeekPF as opp_PF,
-            me.leagueID as league_id, me.matchupID as matchup_id, me.wins as wins, me.losses as losses, opp.wins as opp_wins, opp.losses as opp_losses, me.year as year,
-            (select count(1) FROM Teams t where t.currentWeekPF > me.currentWeekPF and t.year=%s)+1 as ranking,
-            (select count(1) FROM Teams t where t.currentWeekPF > opp.currentWeekPF and t.year=%s)+1 as opp_ranking
-            FROM Teams AS me
-            LEFT JOIN Teams AS opp ON (me.CurrOpp=opp.teamID AND me.year=opp.year)
-            INNER JOIN Users AS me_u ON me.ownerID=me_u.FFid
-            LEFT JOIN Users AS opp_u ON opp.ownerID=opp_u.FFid
-            INNER JOIN Leagues AS l ON (me.leagueID=l.id AND me.year=l.year)
-    """
-    params = [year, year]
+    query = matchup_query
+    params = []
 
     if division != None:
         query += "WHERE LOWER(l.name)=%s "
@@ -280,67 +439,466 @@ def get_user_matchup_from_database(user, division=None):
 
     query += "AND LOWER(me_u.FFname)=%s AND l.year=%s"
     params.extend([user, year])
-    
-    cursor.execute(query, tuple(params))
 
-    matchup = cursor.fetchall()
-    cursor.close()
+    ensure_weekly_rankings(year)
+    return query_database(query, tuple(params))
 
-    return matchup
+# Same as get_user_matchup_from_database, but for a whole list of (user, division) pairs in a single query.
+# Returns a dict of (sanitized user, lower-case division) -> list of matchups, so callers can check for missing or duplicate matchups the same way.
+def get_user_matchups_from_database(users):
+    pairs = list({(sanitize_user(user), division.lower()) for user, division in users})
+    matchups = {pair: [] for pair in pairs}
+    if len(pairs) == 0:
+        return matchups
+
+    query = matchup_query + "WHERE l.year=%s AND (LOWER(me_u.FFname), LOWER(l.name)) IN (" + ", ".join(["(%s, %s)"]*len(pairs)) + ")"
+    year = Config.config["year"]
+    params = [year]
+    for pair in pairs:
+        params.extend(pair)
+
+    # MySQL matched these case and accent insensitively, so map each row back to the pair(s) it was asked for the same way
+    requested = {}
+    for pair in pairs:
+        requested.setdefault((collate(pair[0]), collate(pair[1])), []).append(pair)
+
+    ensure_weekly_rankings(year)
+    for matchup in query_database(query, tuple(params)):
+        for pair in requested.get((collate(matchup["name"]), collate(matchup["league_name"])), []):
+            matchups[pair].append(matchup)
+
+    return matchups
+
+# Weekly PF rankings across every OTH team, precomputed so a matchup lookup is a plain indexed join
+# instead of two correlated counts over the whole Teams table. Call this whenever currentWeekPF changes.
+# It's a no-op if nothing changed since the last refresh.
+# The table is created on the first refresh of each year if it doesn't exist yet.
+TEAM_RANKINGS_TABLE = "CREATE TABLE IF NOT EXISTS TeamRankings (year INT, teamID INT, ranking INT, PRIMARY KEY (year, teamID))"
+
+if "rankings_checksums" not in globals():
+    rankings_checksums = {}
+
+def refresh_weekly_rankings(year):
+    if year not in rankings_checksums:
+        query_database(TEAM_RANKINGS_TABLE, fetch=None)
+
+    checksum = query_database("SELECT COUNT(1) AS teams, COALESCE(SUM(CRC32(CONCAT(teamID, ':', currentWeekPF))), 0) AS checksum FROM Teams WHERE year=%s", (year,), fetch="one")
+    checksum = (checksum["teams"], checksum["checksum"])
+    if rankings_checksums.get(year) == checksum:
+        return
+
+    # RANK() matches the old "number of teams with more PF, plus one", including ties
+    query_database("""
+        INSERT INTO TeamRankings (year, teamID, ranking)
+            SELECT year, teamID, RANK() OVER (ORDER BY currentWeekPF DESC) FROM Teams WHERE year=%s
+        ON DUPLICATE KEY UPDATE ranking=VALUES(ranking)
+    """, (year,), fetch=None)
+
+    rankings_checksums[year] = checksum
+
+# The matchup lookups join on TeamRankings, so make sure it's been built at least once this run
+def ensure_weekly_rankings(year):
+    if year not in rankings_checksums:
+        refresh_weekly_rankings(year)
+
+# Whether the fleaflicker season is running, for the background jobs that only matter during it
+def is_fantasy_season():
+    return datetime.now().month in FANTASY_SEASON_MONTHS
 
 def bucket_time(minutes):
     dt = datetime.now()
     bucket_minute = (dt.minute // minutes) * minutes
     return dt.replace(minute=bucket_minute, second=0, microsecond=0)
 
-telemetry = {}
-def log_api_usage_telemetry(site):
-    if site not in telemetry:
-        telemetry[site] = {}
+# Guards all of the telemetry buckets below. They're logged from worker threads (the database helpers) as well as
+# the event loop, and flush_telemetry swaps them out from its own thread.
+if "telemetry_lock" not in globals():
+    telemetry_lock = threading.Lock()
 
-    bucket = bucket_time(minutes=1).strftime("%Y-%m-%d %H:%M:%S")
-    if bucket not in telemetry[site]:
-        telemetry[site][bucket] = 0
+# Per-minute call counts by site. Kept across importlib.reload(Shared) so a reload doesn't drop unflushed counts.
+if "telemetry" not in globals():
+    telemetry = {}
 
-    telemetry[site][bucket] += 1
+def log_api_usage_telemetry(site):
+    bucket = bucket_time(minutes=1).strftime("%Y-%m-%d %H:%M:%S")
+    with telemetry_lock:
+        if site not in telemetry:
+            telemetry[site] = {}
+        if bucket not in telemetry[site]:
+            telemetry[site][bucket] = 0
+
+        telemetry[site][bucket] += 1
+
+# Upper bounds (in ms) of the latency histogram buckets. Anything slower lands in the last one.
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 60000]
+
+def get_latency_bucket(latency_ms):
+    for bound in LATENCY_BUCKETS_MS:
+        if latency_ms <= bound:
+            return bound
+    return LATENCY_BUCKETS_MS[-1]
+
+# Path segments that are ids or dates, which get collapsed so every game, league, etc shares one endpoint.
+# Anything else with digits in it (like the /v1 API version) is left alone.
+endpoint_id_pattern = re.compile(r"\d+|\d{4}-\d{2}-\d{2}")
+
+# ie /v1/gamecenter/2024020001/play-by-play -> /v1/gamecenter/{id}/play-by-play
+def get_endpoint_from_link(link):
+    path = urlparse(link).path
+    return "/".join("{id}" if endpoint_id_pattern.fullmatch(part) else part for part in path.split("/"))
+
+# Per-minute latency histograms by endpoint and status code, along with payload bytes.
+# (time_bucket, site, endpoint, status, latency_bucket_ms) -> [count, bytes]
+if "endpoint_telemetry" not in globals():
+    endpoint_telemetry = {}
+
+# status is 0 when the request never got a response (timeouts, connection errors)
+def log_api_response_telemetry(link, status, latency_ms, num_bytes):
+    bucket = bucket_time(minutes=1).strftime("%Y-%m-%d %H:%M:%S")
+    key = (bucket, get_site_from_link(link), get_endpoint_from_link(link), status, get_latency_bucket(latency_ms))
+    with telemetry_lock:
+        if key not in endpoint_telemetry:
+            endpoint_telemetry[key] = [0, 0]
+
+        endpoint_telemetry[key][0] += 1
+        endpoint_telemetry[key][1] += num_bytes
+
+# Per-minute hit and miss counts for the in-memory caches.
+# (time_bucket, cache) -> [hits, misses]
+if "cache_telemetry" not in globals():
+    cache_telemetry = {}
+
+def log_cache_telemetry(cache, hits, misses):
+    key = (bucket_time(minutes=1).strftime("%Y-%m-%d %H:%M:%S"), cache)
+    with telemetry_lock:
+        if key not in cache_telemetry:
+            cache_telemetry[key] = [0, 0]
+
+        cache_telemetry[key][0] += hits
+        cache_telemetry[key][1] += misses
+
+# Tables added alongside ApiUsageTelemetry. Each one is created the first time it's written to if it doesn't exist yet.
+TELEMETRY_TABLES = {
+    "ApiEndpointTelemetry": "CREATE TABLE IF NOT EXISTS ApiEndpointTelemetry (time_bucket DATETIME, site VARCHAR(64), endpoint VARCHAR(255), status SMALLINT, " + \
+                            "latency_bucket_ms INT, count INT, bytes BIGINT, PRIMARY KEY (time_bucket, site, endpoint, status, latency_bucket_ms))",
+    "CacheTelemetry": "CREATE TABLE IF NOT EXISTS CacheTelemetry (time_bucket DATETIME, cache VARCHAR(64), hits INT, misses INT, PRIMARY KEY (time_bucket, cache))"
+}
+
+# Tables that have been checked this run, and how many flushes in a row have failed to write something
+if "telemetry_state" not in globals():
+    telemetry_state = {"created_tables": set(), "failed_flushes": 0}
+
+# Writes one table's rows in a single transaction, so a failed write can be retried without double counting
+def write_telemetry_rows(table, query, rows):
+    with db_pool.connection() as connection:
+        with connection.cursor() as cursor:
+            if table in TELEMETRY_TABLES and table not in telemetry_state["created_tables"]:
+                cursor.execute(TELEMETRY_TABLES[table])
+                telemetry_state["created_tables"].add(table)
+
+            connection.begin()
+            try:
+                cursor.executemany(query, rows)
+                connection.commit()
+            except:
+                connection.rollback()
+                raise
 
+# Writes out everything collected since the last flush with one batched insert per table.
+# Blocking, so it runs on a worker thread from telemetry_loop.
+# Each table is written on its own, so one broken table doesn't hold up the others. Rows that fail to write are put back
+# for the next flush, up to TELEMETRY_MAX_FAILED_FLUSHES flushes in a row, after which they're dropped.
 def flush_telemetry():
-    global telemetry
-    DB = pymysql.connect(host=Config.config["sql_hostname"], user=Config.config["sql_username"], passwd=Config.config["sql_password"], db=Config.config["sql_dbname"], cursorclass=pymysql.cursors.DictCursor)
-    cursor = DB.cursor()
-
-    query = "INSERT INTO ApiUsageTelemetry (time_bucket, site, count) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE count = count + VALUES(count)"
-
-    for site, buckets in telemetry.items():
-        for bucket, count in buckets.items():
-            cursor.execute(query, (bucket, site, count))
+    global telemetry, endpoint_telemetry, cache_telemetry
+
+    # Swap the buckets out first so anything logged while we're writing lands in the next flush
+    with telemetry_lock:
+        buckets, telemetry = telemetry, {}
+        endpoints, endpoint_telemetry = endpoint_telemetry, {}
+        caches, cache_telemetry = cache_telemetry, {}
+
+    usage_rows = [(bucket, site, count) for site, site_buckets in buckets.items() for bucket, count in site_buckets.items()]
+    endpoint_rows = [(*key, count, num_bytes) for key, (count, num_bytes) in endpoints.items()]
+    cache_rows = [(*key, hits, misses) for key, (hits, misses) in caches.items()]
+    if len(usage_rows) == 0 and len(endpoint_rows) == 0 and len(cache_rows) == 0:
+        return
+
+    writes = [("ApiUsageTelemetry", "INSERT INTO ApiUsageTelemetry (time_bucket, site, count) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE count = count + VALUES(count)", usage_rows),
+              ("ApiEndpointTelemetry", "INSERT INTO ApiEndpointTelemetry (time_bucket, site, endpoint, status, latency_bucket_ms, count, bytes) VALUES (%s, %s, %s, %s, %s, %s, %s) " + \
+                                       "ON DUPLICATE KEY UPDATE count = count + VALUES(count), bytes = bytes + VALUES(bytes)", endpoint_rows),
+              ("CacheTelemetry", "INSERT INTO CacheTelemetry (time_bucket, cache, hits, misses) VALUES (%s, %s, %s, %s) " + \
+                                 "ON DUPLICATE KEY UPDATE hits = hits + VALUES(hits), misses = misses + VALUES(misses)", cache_rows)]
+
+    failed = {}
+    for table, query, rows in writes:
+        if len(rows) == 0:
+            continue
+        try:
+            write_telemetry_rows(table, query, rows)
+        except Exception as e:
+            logging.getLogger("Bot").error(f"Error writing {table}: {type(e).__name__}: {e}")
+            failed[table] = e
+
+    if len(failed) == 0:
+        telemetry_state["failed_flushes"] = 0
+        return
+
+    telemetry_state["failed_flushes"] += 1
+    if telemetry_state["failed_flushes"] >= TELEMETRY_MAX_FAILED_FLUSHES:
+        # Whatever's wrong isn't going away on its own, so stop holding onto rows that will never be written
+        telemetry_state["failed_flushes"] = 0
+        logging.getLogger("Bot").warning(f"Dropping unwritten telemetry for {', '.join(failed)} after {TELEMETRY_MAX_FAILED_FLUSHES} failed flushes.")
+    else:
+        # Put the failed tables' rows back so they go out with the next flush
+        with telemetry_lock:
+            if "ApiUsageTelemetry" in failed:
+                for site, site_buckets in buckets.items():
+                    for bucket, count in site_buckets.items():
+                        telemetry.setdefault(site, {})
+                        telemetry[site][bucket] = telemetry[site].get(bucket, 0) + count
+            if "ApiEndpointTelemetry" in failed:
+                for key, (count, num_bytes) in endpoints.items():
+                    totals = endpoint_telemetry.setdefault(key, [0, 0])
+                    totals[0] += count
+                    totals[1] += num_bytes
+            if "CacheTelemetry" in failed:
+                for key, (hits, misses) in caches.items():
+                    totals = cache_telemetry.setdefault(key, [0, 0])
+                    totals[0] += hits
+                    totals[1] += misses
+
+# Flushes telemetry on its own timer so nothing on the scoreboard path waits on the database. Started by the bot in setup_hook.
+# Kept across importlib.reload(Shared) so the loop that's running is the one DiscordBot cancels on close.
+# The body looks up run_telemetry_flush each time, so it still picks up reloaded code.
+if "telemetry_loop" not in globals():
+    @tasks.loop(seconds=TELEMETRY_FLUSH_SECONDS)
+    async def telemetry_loop():
+        await run_telemetry_flush()
+
+# Errors get logged and wait for the next interval. Restarting the loop would retry right away, and since failed rows
+# are put back there'd always be something to retry.
+async def run_telemetry_flush():
+    try:
+        await asyncio.to_thread(flush_telemetry)
+    except Exception as e:
+        logging.getLogger("Bot").error(f"Error flushing telemetry: {type(e).__name__}: {e}")
+
+# Shared, pooled HTTP session for every API call the bot makes. Created lazily because
+# aiohttp sessions need to be created from inside the running event loop. Kept across
+# importlib.reload(Shared) so reloading cogs doesn't leak open sessions.
+if "http_session" not in globals():
+    http_session = None
+
+def get_http_session():
+    global http_session
+    if http_session == None or http_session.closed:
+        # Keep-alive connections are pooled per host, and aiohttp sends Accept-Encoding for
+        # gzip/deflate (and br when the Brotli package is installed) and decodes the body for us.
+        connector = aiohttp.TCPConnector(limit=HTTP_MAX_CONNECTIONS, limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST, keepalive_timeout=60, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+        http_session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    return http_session
+
+async def close_http_session():
+    global http_session
+    if http_session != None and not http_session.closed:
+        await http_session.close()
+    http_session = None
+
+def get_site_from_link(link):
+    return urlparse(link).netloc.replace("www.", "")
+
+# Per-request timeouts replace the session's whole ClientTimeout, so carry the connect timeout over too
+def get_request_timeout(timeout):
+    return aiohttp.ClientTimeout(total=timeout, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+
+# Opens a GET request on the shared session and yields the response along with a stats dict, logging usage,
+# latency, and payload size telemetry along the way. Callers read the body themselves and add what they read
+# to stats["bytes"]. Raises LinkError if there's no response or reading it fails.
+@asynccontextmanager
+async def open_http_request(link, log=None, headers=None, timeout=HTTP_TIMEOUT_SECONDS):
+    # Log telemetry to ensure I'm not overusing APIs
+    site = get_site_from_link(link)
+    log_api_usage_telemetry(site)
 
-    DB.commit()
-    cursor.close()
-    DB.close()
+    start = time.monotonic()
+    stats = {"bytes": 0}
+    try:
+        session = get_http_session()
+        async with session.get(link, headers=headers, timeout=get_request_timeout(timeout)) as response:
+            if log and response.status not in [200, 304]:
+                log.info(f"API call to {link} returned status code {response.status}.")
+            yield response, stats
+    except Exception as e:
+        log_api_response_telemetry(link, 0, 1000*(time.monotonic()-start), stats["bytes"])
+        raise LinkError(str(e) + "\n"+ str(e.__cause__))
 
-    telemetry = {}
+    log_api_response_telemetry(link, response.status, 1000*(time.monotonic()-start), stats["bytes"])
+
+# Makes a GET request on the shared session and returns the status code, headers, and body bytes.
+async def make_http_request(link, log=None, headers=None, timeout=HTTP_TIMEOUT_SECONDS):
+    async with open_http_request(link, log, headers, timeout) as (response, stats):
+        body = await response.read()
+        stats["bytes"] = len(body)
+
+    return response.status, response.headers, body
+
+# How long responses from slow-changing endpoints can be reused, by url pattern. Anything else is always fetched,
+# unless the caller knows better and passes cache_ttl (ie landing pages for games that are already over).
+API_CACHE_RULES = [
+    (re.compile(r"api-web\.nhle\.com/v1/playoff-series/carousel/"), 10*60),
+    (re.compile(r"fleaflicker\.com/api/FetchLeagueStandings"), 30*60)
+]
+
+def get_api_cache_ttl(link):
+    for pattern, ttl in API_CACHE_RULES:
+        if pattern.search(link):
+            return ttl
+    return None
+
+# Cached API responses by url: body, ETag and Last-Modified validators, and the monotonic time they expire.
+# Kept across importlib.reload(Shared) so a reload doesn't empty it.
+if "api_response_cache" not in globals():
+    api_response_cache = {}
+
+# Fetches a url for make_api_call and returns the body. With a ttl, the response is cached, an expired entry is
+# revalidated with If-None-Match/If-Modified-Since, and the cached body is returned if the API errors out.
+async def fetch_api_body(link, log, timeout, ttl):
+    headers = {"Cache-Control": "must-revalidate, max-age=0", "Pragma": "no-cache"}
+    if ttl == None:
+        status, response_headers, body = await make_http_request(link, log, headers, timeout)
+        return body
+
+    entry = api_response_cache.get(link)
+    if entry != None:
+        if entry["etag"] != None:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"] != None:
+            headers["If-Modified-Since"] = entry["last_modified"]
 
-def make_api_call(link, log=None):
-    # Log telemetry to ensure I'm not overusing APIs
+    try:
+        status, response_headers, body = await make_http_request(link, log, headers, timeout)
+    except LinkError:
+        if entry == None:
+            raise
+        status = 0
+
+    now = time.monotonic()
+    if status == 304 and entry != None:
+        entry["expires"] = now + ttl
+        return entry["body"]
+
+    if status == 200:
+        # Drop anything that's too old to ever be served again while we're in here
+        for url in [url for url, old in api_response_cache.items() if old["expires"] + API_CACHE_MAX_STALE_SECONDS < now]:
+            del api_response_cache[url]
+
+        api_response_cache[link] = {"body": body, "etag": response_headers.get("ETag"), "last_modified": response_headers.get("Last-Modified"), "expires": now + ttl}
+        return body
+
+    # The API is having problems, so fall back to what we had if it's not too old
+    if entry != None and now < entry["expires"] + API_CACHE_MAX_STALE_SECONDS:
+        if log:
+            log.info(f"Serving cached response for {link} after status code {status}.")
+        return entry["body"]
+
+    if status == 0:
+        raise LinkError(link)
+    return body
+
+# Fetches in progress for make_api_call, by url
+in_flight_api_calls = {}
+
+def finish_in_flight_api_call(link, task):
+    if in_flight_api_calls.get(link) is task:
+        del in_flight_api_calls[link]
+
+    # Retrieve the exception here in case every caller was cancelled, so asyncio doesn't warn that nobody did
+    if not task.cancelled():
+        task.exception()
+
+# Concurrent fetches for the same url share one request (ie a bunch of people running /score right after a goal).
+# Returns the in-flight task, which resolves to the body.
+def start_api_fetch(link, log, timeout, ttl):
+    task = in_flight_api_calls.get(link)
+    if task == None:
+        task = asyncio.ensure_future(fetch_api_body(link, log, timeout, ttl))
+        task.add_done_callback(lambda task: finish_in_flight_api_call(link, task))
+        in_flight_api_calls[link] = task
+        log_cache_telemetry("api_single_flight", 0, 1)
+    else:
+        log_cache_telemetry("api_single_flight", 1, 0)
+    return task
+
+# Each caller parses the body itself, so nobody ends up with a dict that someone else is modifying.
+# Urls matching API_CACHE_RULES (or any url, with cache_ttl) are served from api_response_cache while fresh.
+# Once expired, the cached body is still served right away while it gets revalidated in the background.
+async def make_api_call(link, log=None, timeout=HTTP_TIMEOUT_SECONDS, cache_ttl=None):
     if "://" not in link:
         link = "https://" + link
-    site = urlparse(link).netloc.replace("www.", "")
-    log_api_usage_telemetry(site)
+
+    ttl = cache_ttl if cache_ttl != None else get_api_cache_ttl(link)
+    entry = api_response_cache.get(link) if ttl != None else None
+    now = time.monotonic()
+    if entry != None and now < entry["expires"]:
+        log_cache_telemetry("api_response", 1, 0)
+        body = entry["body"]
+    elif entry != None and now < entry["expires"] + API_CACHE_MAX_STALE_SECONDS:
+        log_cache_telemetry("api_response", 1, 0)
+        start_api_fetch(link, log, timeout, ttl)
+        body = entry["body"]
+    else:
+        if ttl != None:
+            log_cache_telemetry("api_response", 0, 1)
+
+        # Shielded so one caller getting cancelled doesn't cancel the fetch for everyone else
+        body = await asyncio.shield(start_api_fetch(link, log, timeout, ttl))
 
     try:
-        with requests.get(link, headers={"Cache-Control": "must-revalidate, max-age=0", "Pragma": "no-cache"}) as response:
-            if log and response.status_code != 200:
-                log.info(f"API call to {link} returned status code {response.status_code}.")
-            try:
-                data = response.json()
-            except Exception as e:
-                data = None
+        data = json.loads(body)
     except Exception as e:
-        raise LinkError(str(e) + "\n"+ str(e.__cause__))
+        data = None
 
     return data
 
+# Streams a page and returns the first capture group of pattern (a compiled bytes regex) as a string, or None.
+# Stops reading as soon as it matches, so we don't download and parse a whole page to scrape one value.
+async def find_in_page(link, pattern, log=None, timeout=HTTP_TIMEOUT_SECONDS):
+    if "://" not in link:
+        link = "https://" + link
+
+    found = None
+    async with open_http_request(link, log, None, timeout) as (response, stats):
+        buffer = b""
+        async for chunk in response.content.iter_chunked(16*1024):
+            stats["bytes"] += len(chunk)
+            buffer += chunk
+            match = pattern.search(buffer)
+            if match:
+                found = match.group(1).decode("utf-8")
+                break
+
+            # Keep the tail around in case the match is split across chunks
+            buffer = buffer[-1024:]
+
+    return found
+
+# Spaces out requests to each host so a burst of concurrent scrapes doesn't hammer one site
+class HostRateLimiter():
+    def __init__(self, per_second):
+        self.interval = 1.0/per_second
+        self.next_slot = {}
+
+    async def wait(self, link):
+        site = get_site_from_link(link)
+        now = time.monotonic()
+
+        # Reserve the next open slot for this host before sleeping, so concurrent callers queue up behind each other
+        slot = max(now, self.next_slot.get(site, now))
+        self.next_slot[site] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
 #endregion
 #region Server helper functions
 
@@ -404,11 +962,13 @@ def sanitize(name):
 #region Datafile helper functions
 
 channels_datafile = "data/channels.json"
+inactives_datafile = "data/inactives.json"
 memes_datafile = "data/memes.json"
 messages_datafile = "data/messages.json"
 ot_datafile = "data/ot.json"
 pickems_datafile = "data/pickems.json"
 pickemsstandings_datafile = "data/pickemsstandings.json"
+posted_trades_datafile = "data/posted_trades.txt"
 
 def get_latest_otstandings_datafile():
     files = glob.glob("data/otstandings_*.json")
@@ -436,28 +996,121 @@ def get_otstandings_datafile(year, season_type):
 
     filename = f"data/otstandings_{yearpart}{yearpart+1}_{season_type}.json"
     if not os.path.exists(f"{Config.config['srcroot']}/{filename}"):
-        with open(filename, "w") as f:
-            json.dump({}, f)
+        WriteJsonFile(filename, {})
 
     return filename
 
-def WriteJsonFile(file, data):
+# Writes a file by writing a temp file next to it and renaming it over the original,
+# so a crash partway through can never leave a truncated file behind
+def write_file_atomic(file, contents):
+    path = f"{Config.config['srcroot']}/{file}"
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(contents)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+    # Whatever we had parsed for this file is out of date now
+    json_file_cache.pop(path, None)
+
+# Compact output is much faster to write and parse, so use it for files nobody reads by hand
+def dump_json(data, compact=False):
+    if compact:
+        return json.dumps(data, separators=(",", ":"))
+    return json.dumps(data, indent=4)
+
+def WriteJsonFile(file, data, compact=False):
     try:
-        with open(f"{Config.config['srcroot']}/{file}", "w") as f:
-            json.dump(data, f, indent=4)
+        write_file_atomic(file, dump_json(data, compact))
     except:
         raise DataFileNotFound(file)
-    
-def LoadJsonFile(file):
+
+# Parsed datafiles keyed on path, along with the mtime and size they were parsed at.
+# Kept across importlib.reload(Shared) like the rest of the module state.
+if "json_file_cache" not in globals():
+    json_file_cache = {}
+
+# With cached=True, the file is only re-parsed if it has changed on disk since the last load.
+# The cached object is shared between callers, so treat it as read-only.
+def LoadJsonFile(file, cached=False):
+    path = f"{Config.config['srcroot']}/{file}"
     try:
-        with open(f"{Config.config['srcroot']}/{file}", "r") as f:
+        if cached:
+            stat = os.stat(path)
+            version = (stat.st_mtime_ns, stat.st_size)
+            if path in json_file_cache and json_file_cache[path][0] == version:
+                return json_file_cache[path][1]
+
+        with open(path, "r") as f:
             try:
-                return json.load(f)
+                data = json.load(f)
             except:
                 return {}
     except:
         raise DataFileNotFound(file)
 
+    if cached:
+        json_file_cache[path] = (version, data)
+
+    return data
+
+# A set of ids kept in a file with one id per line, for things that should only ever be posted once.
+# The file is read once, membership checks hit the in-memory set, and new ids are appended to the file.
+class IdSetFile():
+    def __init__(self, file):
+        self.file = file
+        self.ids = None
+
+    def load(self):
+        if self.ids != None:
+            return
+
+        try:
+            with open(f"{Config.config['srcroot']}/{self.file}", "r") as f:
+                self.ids = {int(line) for line in f if line.strip() != ""}
+        except FileNotFoundError:
+            self.ids = set()
+
+    def __contains__(self, id):
+        self.load()
+        return id in self.ids
+
+    def add(self, id):
+        self.load()
+        if id in self.ids:
+            return
+
+        with open(f"{Config.config['srcroot']}/{self.file}", "a") as f:
+            f.write(f"{id}\n")
+        self.ids.add(id)
+
+# Write-behind persistence for a datafile that changes constantly. Callers mark it dirty whenever they
+# change the data, and the owning cog calls flush() on a timer and when it unloads. The data is serialized
+# on the event loop so the snapshot is consistent, and the write itself happens on a worker thread.
+class JsonFileWriter():
+    def __init__(self, file, get_data):
+        self.file = file
+        self.get_data = get_data
+        self.dirty = False
+        self.lock = asyncio.Lock()
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    async def flush(self):
+        async with self.lock:
+            if not self.dirty:
+                return
+
+            self.dirty = False
+            contents = dump_json(self.get_data(), compact=True)
+            try:
+                await asyncio.to_thread(write_file_atomic, self.file, contents)
+            except Exception as e:
+                self.dirty = True
+                raise DataFileNotFound(self.file) from e
+
 #endregion
 #region AppCommand Checks
 